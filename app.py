@@ -1,21 +1,24 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from collections import deque
 from datetime import datetime
-from data_fetcher import get_stock_data, get_stock_news
+from data_fetcher import get_stock_data, get_stock_data_batch, get_stock_news, get_stock_news_items, get_ohlcv_cache
 from feature_engineering import add_technical_indicators, create_labels
-from models import train_random_forest, predict_signal
+from tick_ingestion import TickIngestor
+from live_trading import LiveTrader
+from model_registry import get_model_registry
 from sentiment import compute_sentiment
-from backtest import backtest_strategy
-from portfolio import allocate_portfolio
+from batch_engine import BatchEngine, get_result_store, run_config, config_key
+from scanner import Panel, scan
+from ensemble import EnsembleScorer, load_ensemble_models
 from broker_api import (
-    kite, generate_session, fetch_orders, fetch_positions, place_order,
-    set_access_token_from_file, get_instrument_token, start_live_feed,
-    auto_place_order
+    get_kite, generate_session, get_order_manager,
+    set_access_token_from_file, get_instrument_tokens, start_live_feed
 )
 from risk_management import RiskManager
-from config import DEFAULT_CAPITAL, STOP_LOSS, TAKE_PROFIT
+import metrics
+from config import (DEFAULT_CAPITAL, STOP_LOSS, TAKE_PROFIT, INFERENCE_WINDOW_MS, METRICS_ENABLED, METRICS_PORT,
+                    REFRESH_INTERVAL)
 import threading
 import time
 
@@ -35,7 +38,7 @@ if not st.session_state.zerodha_authenticated:
 if not st.session_state.zerodha_authenticated:
     st.sidebar.header("📌 Zerodha Login")
     st.sidebar.write("1. Click this login URL and sign in with Zerodha credentials:")
-    st.sidebar.code(kite.login_url())
+    st.sidebar.code(get_kite().login_url())
     request_token = st.sidebar.text_input("Enter Request Token (from URL redirect after login):")
     if st.sidebar.button("Generate Session"):
         if request_token:
@@ -57,6 +60,18 @@ tickers = st.multiselect(
     default=["AAPL", "MSFT"]
 )
 capital = st.sidebar.number_input("Starting Capital ($ or INR)", value=DEFAULT_CAPITAL)
+allocation_method = st.sidebar.selectbox(
+    "Allocation Method", ["equal", "risk_parity", "mean_variance"],
+    format_func=lambda m: m.replace("_", " ").title()
+)
+collect_metrics = st.sidebar.checkbox("Collect performance metrics", value=METRICS_ENABLED)
+metrics.enable(collect_metrics)
+if collect_metrics and "metrics_server" not in st.session_state:
+    try:
+        st.session_state.metrics_server = metrics.serve(METRICS_PORT)
+    except OSError as e:
+        st.session_state.metrics_server = None
+        print(f"[ERROR] Metrics endpoint not started on port {METRICS_PORT}: {e}")
 
 if not tickers:
     st.warning("Please select at least one ticker to continue.")
@@ -64,134 +79,163 @@ if not tickers:
 
 # -- Setup ticker-to-token mappings --
 if st.session_state.zerodha_authenticated:
-    token_to_ticker = {}
-    ticker_to_token = {}
+    ticker_to_token = get_instrument_tokens(tickers)
+    token_to_ticker = {token: t for t, token in ticker_to_token.items()}
     for t in tickers:
-        try:
-            token = get_instrument_token(t)
-            if token:
-                token_to_ticker[token] = t
-                ticker_to_token[t] = token
-        except Exception:
+        if t not in ticker_to_token:
             st.error(f"Failed to get instrument token for {t}")
 
-    # Initialize persistent session states
-    if "price_histories" not in st.session_state:
-        st.session_state.price_histories = {t: deque(maxlen=250) for t in tickers}
-    if "live_signals" not in st.session_state:
-        st.session_state.live_signals = {t: "N/A" for t in tickers}
-    if "live_prices" not in st.session_state:
-        st.session_state.live_prices = {t: 0.0 for t in tickers}
     if "portfolio_allocation" not in st.session_state:
         st.session_state.portfolio_allocation = {}
 
-    risk_manager = RiskManager(capital, stop_loss_pct=STOP_LOSS, take_profit_pct=TAKE_PROFIT)
+    order_manager = get_order_manager()
 
-    # Train ML model (Random Forest example on first ticker)
+    # Load or train ML model (Random Forest example on first ticker); the registry
+    # reuses a saved model when the data end-date and params are unchanged
     if "rf_model" not in st.session_state:
-        with st.spinner(f"Training model on {tickers[0]} data..."):
+        with st.spinner(f"Loading model for {tickers[0]} data..."):
             df_train = get_stock_data(tickers[0])
             df_train = add_technical_indicators(df_train)
             df_train = create_labels(df_train)
-            model_rf, accuracy = train_random_forest(df_train)
-            st.success(f"Random Forest model trained with accuracy: {accuracy:.2%}")
+            model_rf, _, model_metrics = get_model_registry().get_or_train("RandomForest", tickers[0], df_train)
+            st.success(f"Random Forest model ready with accuracy: {model_metrics['accuracy']:.2%}")
             st.session_state.rf_model = model_rf
 
     model_rf = st.session_state.rf_model
 
-    # Function to update price history and generate signals
-    def update_price_and_predict(ticker, price):
-        st.session_state.price_histories[ticker].append(price)
-        prices_list = list(st.session_state.price_histories[ticker])
-
-        if len(prices_list) < 50:
-            # Need minimum data for reliable indicators
-            return
-
-        df_temp = pd.DataFrame({
-            "Open": prices_list,
-            "High": prices_list,
-            "Low": prices_list,
-            "Close": prices_list
-        })
+    # Indicators, batched inference, signal orders and risk exits; the paper simulator runs the same class
+    if "live_trader" not in st.session_state:
+        risk_manager = RiskManager(capital, stop_loss_pct=STOP_LOSS, take_profit_pct=TAKE_PROFIT)
+        st.session_state.live_trader = LiveTrader(model_rf, token_to_ticker, risk_manager, order_manager,
+                                                  window_ms=INFERENCE_WINDOW_MS)
+    live_trader = st.session_state.live_trader
+    inference_scheduler = live_trader.scheduler
 
-        df_temp = add_technical_indicators(df_temp)
-        df_temp = create_labels(df_temp)
-        if df_temp.empty:
-            return
-
-        latest_feat = df_temp.iloc[-1:]
-        new_signal = predict_signal(model_rf, latest_feat)
-        old_signal = st.session_state.live_signals.get(ticker, "N/A")
-
-        # Only trade if signal changed and risk manager allows trade now
-        if new_signal != old_signal and risk_manager.can_trade(ticker):
-            # Calculate shares based on portfolio allocation & latest price
-            allocation = st.session_state.portfolio_allocation.get(ticker, capital / len(tickers))
-            shares = max(1, int(allocation / latest_feat["Close"].values[0]))
-
-            # Place order via Zerodha
-            order_id = auto_place_order(ticker, new_signal, shares)
-            if order_id:
-                st.session_state.live_signals[ticker] = new_signal
-                risk_manager.update_trade_time(ticker)
-
-        st.session_state.live_prices[ticker] = price
-
-    # Zerodha live tick event handler
-    def on_live_ticks(ws, ticks):
-        for tick in ticks:
-            token = tick["instrument_token"]
-            price = tick["last_price"]
-            tkr = token_to_ticker.get(token)
-            if tkr:
-                update_price_and_predict(tkr, price)
-
-    # Start WebSocket feed once
+    # Start WebSocket feed once; the KiteTicker callback only enqueues ticks
     if "ws_feed_started" not in st.session_state:
         st.session_state.ws_feed_started = True
-        start_live_feed(list(token_to_ticker.keys()), on_live_ticks)
+        st.session_state.tick_ingestor = TickIngestor(live_trader.on_ticks).start()
+        start_live_feed(list(token_to_ticker.keys()), st.session_state.tick_ingestor.on_ticks)
         st.success("📡 Live Zerodha market data streaming started.")
 
-    # Portfolio allocation based on backtested returns
+    # Portfolio allocation based on backtested returns, read from the batch engine's result store;
+    # runs come from `python batch_engine.py` or the button below, never from a plain page load
     st.subheader("📈 Portfolio Allocation & Backtest")
-    res = []
-    with st.spinner("Calculating portfolio allocation and backtesting..."):
-        for ticker in tickers:
-            df = get_stock_data(ticker)
-            df = add_technical_indicators(df)
-            df = create_labels(df)
-            metrics = backtest_strategy(df, model_rf)
-            last_close = df["Close"].iloc[-1]
-            predicted_return = metrics.get("Total Return %", 0)
-            res.append({"Ticker": ticker, "Last_Close": last_close, "Predicted_Return %": predicted_return})
-
-        results_df = pd.DataFrame(res)
-        portfolio_df = allocate_portfolio(results_df, capital)
+    batch_config = run_config(tickers, capital, allocation_method)
+    result_store = get_result_store()
+    latest_run = result_store.latest(batch_config)
+    batch_command = (f"python batch_engine.py {' '.join(batch_config['tickers'])} --capital {capital} "
+                     f"--method {allocation_method}")
+    if st.button("Run backtest now" if latest_run is None else "Refresh now"):
+        engine_key = config_key(batch_config)
+        if st.session_state.get("batch_engine_key") != engine_key:
+            st.session_state.batch_engine = BatchEngine(tickers, capital, allocation_method, store=result_store)
+            st.session_state.batch_engine_key = engine_key
+        with st.spinner("Calculating portfolio allocation and backtesting..."):
+            st.session_state.batch_engine.run_once()
+        latest_run = result_store.latest(batch_config)
+    if latest_run is None:
+        st.info(f"No backtest results for this selection yet; start `{batch_command}` to compute them in the "
+                "background, or run one now.")
+    else:
+        run_meta, portfolio_df = latest_run
+        pipeline_report = run_meta["report"]
+        for ticker, error in pipeline_report["errors"].items():
+            st.warning(f"Skipped {ticker}: {error}")
+        if run_meta["age_seconds"] > 2 * REFRESH_INTERVAL * 60:
+            st.info(f"Results are stale; start `{batch_command}` to refresh them in the background.")
         st.session_state.portfolio_allocation = dict(zip(portfolio_df["Ticker"], portfolio_df["Allocation_$"]))
+        live_trader.allocation = st.session_state.portfolio_allocation
         st.dataframe(portfolio_df[["Ticker", "Predicted_Return %", "Allocation_$", "Shares"]])
 
+        st.caption(f"Run {run_meta['run_id']} finished {run_meta['age_seconds']:.0f}s ago | Pipeline: " + ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in pipeline_report["stage_seconds"].items()
+        ) + f" | wall {pipeline_report['wall_seconds']:.2f}s on {pipeline_report['workers']} workers")
+
+    cache_stats = get_ohlcv_cache().stats
+    st.sidebar.caption(
+        f"Data cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+        f"{cache_stats['refreshes']} refreshes, {cache_stats['bytes_read'] / 1024:.0f} KiB read"
+    )
+
+    # Cross-sectional scan over a larger universe with one batched model call
+    st.subheader("🔎 Universe Scanner")
+    universe_text = st.text_area("Scanner universe (comma or newline separated tickers)", value=", ".join(tickers))
+    if st.button("Run Scan"):
+        universe = list(dict.fromkeys(u.strip().upper() for u in universe_text.replace("\n", ",").split(",")
+                                      if u.strip()))
+        with st.spinner(f"Scanning {len(universe)} tickers..."):
+            scan_start = time.time()
+            try:
+                panel = Panel.from_frames(get_stock_data_batch(universe))
+                ranked = scan(panel, model_rf)
+                st.dataframe(ranked.head(50)[["Ticker", "Last_Close", "Prob_Up", "Predicted_Return %", "Rank"]])
+                st.caption(f"Scanned {len(panel.tickers)} tickers in {time.time() - scan_start:.2f}s")
+            except ValueError as e:
+                st.warning(f"Scan failed: {e}")
+
+    # Blended RF/XGBoost/LSTM/Prophet/sentiment signal; per-model outputs are cached across reruns
+    st.subheader("🧠 Ensemble Signals")
+    if st.checkbox("Score ensemble (trains missing models on first use)"):
+        # Rebuilt when the training ticker or its data end date changes, so models follow the selection
+        ensemble_train = create_labels(add_technical_indicators(get_stock_data(tickers[0])))
+        ensemble_key = (tickers[0], str(ensemble_train.index[-1])[:10])
+        if st.session_state.get("ensemble_key") != ensemble_key:
+            with st.spinner("Loading ensemble models..."):
+                st.session_state.ensemble_scorer = load_ensemble_models(EnsembleScorer(), tickers[0], ensemble_train)
+                st.session_state.ensemble_key = ensemble_key
+        ensemble_scorer = st.session_state.ensemble_scorer
+        with st.spinner("Scoring ensemble..."):
+            ensemble_frames = {t: add_technical_indicators(df.copy())
+                               for t, df in get_stock_data_batch(tickers).items()}
+            ensemble_news = ({t: get_stock_news_items(t) for t in tickers}
+                             if "Sentiment" in ensemble_scorer.weights else None)
+            ensemble_df, ensemble_report = ensemble_scorer.refresh(ensemble_frames, ensemble_news)
+        st.dataframe(ensemble_df)
+        st.caption(f"Ensemble refresh {ensemble_report['total_seconds'] * 1000:.0f} ms: " + ", ".join(
+            f"{name} {r['seconds'] * 1000:.0f} ms ({r['recomputed']} rescored, {r['cached']} cached)"
+            for name, r in ensemble_report["models"].items()
+        ))
+        for name, error in ensemble_report["errors"].items():
+            st.warning(f"{name} skipped: {error}")
+
     # Live prices & signals display
     st.subheader("🌐 Live Prices & Signals")
     live_data = []
     for t in tickers:
         live_data.append({
             "Ticker": t,
-            "Live Price": round(st.session_state.live_prices.get(t, 0), 2),
-            "Signal": st.session_state.live_signals.get(t, "N/A")
+            "Live Price": round(live_trader.prices.get(t, 0), 2),
+            "Signal": live_trader.signals.get(t, "N/A")
         })
     st.table(pd.DataFrame(live_data))
+    inference_stats = inference_scheduler.stats()
+    st.caption(
+        f"Inference: {inference_stats['rows_scored']} rows in {inference_stats['batches']} batches, "
+        "tick-to-signal " + ", ".join(f"{k} {v:.1f} ms" for k, v in inference_stats["latency_ms"].items())
+    )
+    ingest_stats = st.session_state.tick_ingestor.stats
+    st.caption(
+        f"Ticks: {ingest_stats['received']} received, {ingest_stats['processed']} processed, "
+        f"{ingest_stats['coalesced']} coalesced, {ingest_stats['dropped']} dropped"
+    )
 
     # Show Zerodha positions & orders
     st.subheader("📋 Current Zerodha Positions & Recent Orders")
-    positions = fetch_positions()
+    order_stats = order_manager.stats()
+    st.caption(
+        f"Orders: {order_stats['placed']} placed, {order_stats['failed']} failed, {order_stats['queued']} queued"
+        + (f", submit-to-ack p50 {order_stats['submit_latency_ms']['p50']:.0f} ms"
+           if "submit_latency_ms" in order_stats else "")
+    )
+    positions = live_trader.sync_positions()
     if positions and positions.get("net"):
         st.write("Open Positions:")
         st.dataframe(pd.DataFrame(positions["net"]))
     else:
         st.write("No open positions or data unavailable.")
 
-    orders = fetch_orders()
+    orders = order_manager.orders()
     if orders:
         st.write("Recent Orders:")
         st.dataframe(pd.DataFrame(orders))
@@ -201,3 +245,17 @@ if st.session_state.zerodha_authenticated:
 else:
     st.info("Please authenticate with Zerodha to enable live trading.")
 
+# -- Performance --
+if collect_metrics:
+    st.subheader("⏱️ Stage Latency")
+    stage_rows = metrics.summary_rows()
+    if stage_rows:
+        stage_df = pd.DataFrame(stage_rows).set_index("Stage")
+        st.dataframe(stage_df.style.format("{:.2f}", subset=["p50 ms", "p99 ms", "Total s"]))
+    else:
+        st.write("No timings recorded yet.")
+    if st.session_state.get("metrics_server"):
+        st.caption(f"Prometheus metrics at http://127.0.0.1:{METRICS_PORT}/metrics")
+    if st.button("Export metrics JSON"):
+        st.success(f"Saved {metrics.write_json()}")
+
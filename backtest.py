@@ -1,12 +1,31 @@
+import time
 import numpy as np
+from metrics import timed
 
-def backtest_strategy(df, model):
-    features = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+
+def _bracket_return(entry, open_, high, low, close, stop_loss=None, take_profit=None):
+    # A gap through either level fills at the open; otherwise the stop wins when both are touched
+    open_ret = (open_ - entry) / entry
+    if take_profit is not None and open_ret >= take_profit:
+        return open_ret
+    if stop_loss is not None and open_ret <= -stop_loss:
+        return open_ret
+    if stop_loss is not None and (low - entry) / entry <= -stop_loss:
+        return -stop_loss
+    if take_profit is not None and (high - entry) / entry >= take_profit:
+        return take_profit
+    return (close - entry) / entry
+
+@timed("backtest_loop")
+def backtest_strategy(df, model, stop_loss=None, take_profit=None):
     returns = []
     for i in range(len(df) - 1):
-        pred = model.predict(df[features].iloc[i].values.reshape(1, -1))[0]
+        pred = model.predict(df[FEATURES].iloc[i].values.reshape(1, -1))[0]
         if pred == 1:
-            ret = (df["Close"].iloc[i + 1] - df["Close"].iloc[i]) / df["Close"].iloc[i]
+            bar = df.iloc[i + 1]
+            ret = _bracket_return(df["Close"].iloc[i], bar.get("Open", bar["Close"]), bar.get("High", bar["Close"]),
+                                  bar.get("Low", bar["Close"]), bar["Close"], stop_loss, take_profit)
             returns.append(ret)
         else:
             returns.append(0)
@@ -23,3 +42,73 @@ def backtest_strategy(df, model):
             "MaxDrawdown %": max_dd * 100,
         }
     return {}
+
+def _next_day_returns(df, stop_loss=None, take_profit=None):
+    close = df["Close"].to_numpy(dtype=float).ravel()
+    entry = close[:-1]
+    ret = (close[1:] - entry) / entry
+    if stop_loss is None and take_profit is None:
+        return ret
+
+    # Bracket exits on the next bar, same rules as _bracket_return: gaps through a level fill
+    # at the open, and the stop wins when both levels are touched intrabar.
+    open_ = df["Open"].to_numpy(dtype=float).ravel()[1:] if "Open" in df else close[1:]
+    high = df["High"].to_numpy(dtype=float).ravel()[1:] if "High" in df else close[1:]
+    low = df["Low"].to_numpy(dtype=float).ravel()[1:] if "Low" in df else close[1:]
+    open_ret = (open_ - entry) / entry
+    gap_up = np.zeros(len(ret), dtype=bool)
+    if take_profit is not None:
+        gap_up = open_ret >= take_profit
+        hit = (high - entry) / entry >= take_profit
+        ret = np.where(hit, np.maximum(open_ret, take_profit), ret)
+    if stop_loss is not None:
+        hit = ((low - entry) / entry <= -stop_loss) & ~gap_up
+        ret = np.where(hit, np.minimum(open_ret, -stop_loss), ret)
+    return ret
+
+@timed("backtest")
+def backtest_strategy_vectorized(df, model, stop_loss=None, take_profit=None):
+    if len(df) < 2:
+        return {}
+    preds = np.asarray(model.predict(df[FEATURES].values[:-1]))
+    returns = np.where(preds == 1, _next_day_returns(df, stop_loss, take_profit), 0.0)
+    cumulative = np.cumprod(1 + returns)
+    max_dd = np.min(cumulative / np.maximum.accumulate(cumulative) - 1)
+    return {
+        "Total Return %": returns.sum() * 100,
+        "Win Rate %": np.count_nonzero(returns > 0) / len(returns) * 100,
+        "CAGR %": ((1 + returns.mean()) ** 252 - 1) * 100,
+        "MaxDrawdown %": max_dd * 100,
+    }
+
+def compare_backtests(df, model, stop_loss=None, take_profit=None):
+    start = time.perf_counter()
+    loop_metrics = backtest_strategy(df, model, stop_loss, take_profit)
+    loop_time = time.perf_counter() - start
+    start = time.perf_counter()
+    vec_metrics = backtest_strategy_vectorized(df, model, stop_loss, take_profit)
+    vec_time = time.perf_counter() - start
+    matches = all(np.isclose(loop_metrics[k], vec_metrics[k]) for k in loop_metrics)
+    return {"loop_seconds": loop_time, "vectorized_seconds": vec_time,
+            "speedup": loop_time / vec_time, "metrics_match": matches}
+
+if __name__ == "__main__":
+    import pandas as pd
+    from feature_engineering import add_technical_indicators, create_labels
+    from models import train_random_forest
+
+    rng = np.random.default_rng(0)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, 760)))
+    spread = np.abs(rng.normal(0, 1.0, 760))
+    # Opens gap away from the previous close so bracket exits see gaps through both levels
+    open_ = np.r_[close[0], close[:-1]] * np.exp(rng.normal(0, 0.01, 760))
+    df = pd.DataFrame({"Open": open_, "High": np.maximum(open_, close) + spread,
+                       "Low": np.minimum(open_, close) - spread, "Close": close},
+                      index=pd.bdate_range("2023-01-02", periods=760))
+    df = create_labels(add_technical_indicators(df))
+    model, _ = train_random_forest(df)
+    stats = compare_backtests(df, model)
+    print(f"{len(df)} rows: loop {stats['loop_seconds']:.2f}s, vectorized {stats['vectorized_seconds']:.4f}s "
+          f"({stats['speedup']:.0f}x), metrics match: {stats['metrics_match']}")
+    bracket = compare_backtests(df, model, stop_loss=0.02, take_profit=0.02)
+    print(f"With 2% stop-loss and take-profit: metrics match: {bracket['metrics_match']}")
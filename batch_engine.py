@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+from data_fetcher import get_stock_data, get_stock_data_batch
+from feature_engineering import add_technical_indicators, create_labels
+from model_registry import get_model_registry
+from pipeline import run_pipeline
+from portfolio_optimizer import RollingCovariance, optimize_portfolio
+from risk_management import RiskManager
+from config import RESULTS_DB, RESULTS_KEEP_RUNS, REFRESH_INTERVAL, DEFAULT_CAPITAL, STOP_LOSS, TAKE_PROFIT
+
+ALLOCATION_COLUMNS = ["Ticker", "Last_Close", "Predicted_Return %", "Weight", "Shares", "Allocation_$"]
+
+
+def run_config(tickers, capital, method, model_type="RandomForest", period="2y"):
+    return {"tickers": sorted(tickers), "capital": float(capital), "method": method, "model_type": model_type,
+            "period": period}
+
+def config_key(config):
+    return json.dumps(config, sort_keys=True)
+
+
+class ResultStore:
+    """SQLite store of batch runs: one row per run plus its allocation table, keyed by run config.
+
+    Only the newest keep_runs runs per config are kept.
+    """
+
+    def __init__(self, path=RESULTS_DB, keep_runs=RESULTS_KEEP_RUNS):
+        self.path = path
+        self.keep_runs = keep_runs
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        # WAL so the UI can read while the engine writes from another process
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                          "config TEXT, started_at REAL, finished_at REAL, report TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS allocations (run_id INTEGER, ticker TEXT, last_close REAL, "
+                          "predicted_return REAL, weight REAL, shares INTEGER, allocation REAL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS runs_config ON runs (config, finished_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS allocations_run ON allocations (run_id)")
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def write_run(self, config, portfolio_df, report, started_at):
+        rows = portfolio_df.reindex(columns=ALLOCATION_COLUMNS).itertuples(index=False)
+        with self._lock:
+            cur = self.conn.execute("INSERT INTO runs (config, started_at, finished_at, report) VALUES (?, ?, ?, ?)",
+                                    (config_key(config), started_at, time.time(), json.dumps(report)))
+            run_id = cur.lastrowid
+            self.conn.executemany("INSERT INTO allocations VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                  [(run_id, r[0], float(r[1]), float(r[2]), float(r[3]), int(r[4]), float(r[5]))
+                                   for r in rows])
+            self._prune(config_key(config))
+            self.conn.commit()
+        return run_id
+
+    def _prune(self, key):
+        old = [row[0] for row in self.conn.execute(
+            "SELECT run_id FROM runs WHERE config = ? ORDER BY finished_at DESC LIMIT -1 OFFSET ?",
+            (key, self.keep_runs))]
+        if old:
+            marks = ",".join("?" * len(old))
+            self.conn.execute(f"DELETE FROM allocations WHERE run_id IN ({marks})", old)
+            self.conn.execute(f"DELETE FROM runs WHERE run_id IN ({marks})", old)
+
+    def latest(self, config):
+        # Newest run for this config as (metadata, allocation DataFrame), or None
+        with self._lock:
+            run = self.conn.execute("SELECT run_id, started_at, finished_at, report FROM runs WHERE config = ? "
+                                    "ORDER BY finished_at DESC LIMIT 1", (config_key(config),)).fetchone()
+            if run is None:
+                return None
+            rows = self.conn.execute("SELECT ticker, last_close, predicted_return, weight, shares, allocation "
+                                     "FROM allocations WHERE run_id = ?", (run[0],)).fetchall()
+        meta = {"run_id": run[0], "started_at": run[1], "finished_at": run[2], "report": json.loads(run[3]),
+                "age_seconds": time.time() - run[2]}
+        return meta, pd.DataFrame(rows, columns=ALLOCATION_COLUMNS)
+
+
+result_store = None
+
+def get_result_store():
+    global result_store
+    if result_store is None:
+        result_store = ResultStore()
+    return result_store
+
+
+class BatchEngine:
+    """Runs fetch -> features -> train -> backtest -> allocate for one config and records it in a ResultStore.
+
+    The shared model is trained through the model registry on the first ticker of
+    the sorted config, so every ordering of the same tickers gives the same run, and
+    the rolling covariance is kept between runs.
+    """
+
+    def __init__(self, tickers, capital=DEFAULT_CAPITAL, method="risk_parity", model_type="RandomForest",
+                 period="2y", store=None):
+        self.config = run_config(tickers, capital, method, model_type, period)
+        self.tickers = self.config["tickers"]
+        self.store = store or get_result_store()
+        self.cov_state = None
+
+    def run_once(self):
+        started_at = time.time()
+        wall_start = time.perf_counter()
+        cfg = self.config
+
+        start = time.perf_counter()
+        df_train = create_labels(add_technical_indicators(get_stock_data(cfg["tickers"][0], cfg["period"])))
+        model, _, train_metrics = get_model_registry().get_or_train(cfg["model_type"], cfg["tickers"][0], df_train)
+        model_seconds = time.perf_counter() - start
+
+        results_df, report = run_pipeline(cfg["tickers"], model=model, model_type=cfg["model_type"],
+                                          period=cfg["period"])
+        start = time.perf_counter()
+        cov = None
+        if cfg["method"] != "equal" and len(results_df) > 1:
+            cov_tickers = results_df["Ticker"].tolist()
+            if self.cov_state is None or self.cov_state.tickers != cov_tickers:
+                self.cov_state = RollingCovariance(cov_tickers)
+            closes = pd.concat({t: df["Close"] for t, df in get_stock_data_batch(cov_tickers, cfg["period"]).items()},
+                               axis=1)
+            cov = self.cov_state.update_from_prices(closes).covariance_frame()
+        risk_manager = RiskManager(cfg["capital"], stop_loss_pct=STOP_LOSS, take_profit_pct=TAKE_PROFIT)
+        portfolio_df = optimize_portfolio(results_df, cfg["capital"], cov=cov, method=cfg["method"],
+                                          risk_manager=risk_manager)
+        report["model_seconds"] = model_seconds
+        report["model_metrics"] = train_metrics
+        report["allocate_seconds"] = time.perf_counter() - start
+        report["total_seconds"] = time.perf_counter() - wall_start
+        run_id = self.store.write_run(cfg, portfolio_df, report, started_at)
+        return run_id, report
+
+    def run_forever(self, interval=REFRESH_INTERVAL * 60, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            start = time.monotonic()
+            try:
+                run_id, report = self.run_once()
+                print(f"[INFO] Run {run_id}: {len(self.tickers)} tickers in {report['total_seconds']:.1f}s")
+            except Exception as e:
+                print(f"[ERROR] Batch run failed: {e}")
+            stop.wait(max(0.0, interval - (time.monotonic() - start)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Headless fetch/train/backtest/allocate loop writing to the result store")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--capital", type=float, default=DEFAULT_CAPITAL)
+    parser.add_argument("--method", default="risk_parity", choices=["equal", "risk_parity", "mean_variance"])
+    parser.add_argument("--model", default="RandomForest", choices=["RandomForest", "XGBoost"])
+    parser.add_argument("--period", default="2y")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="minutes between runs")
+    parser.add_argument("--once", action="store_true", help="run a single refresh and exit")
+    args = parser.parse_args()
+
+    engine = BatchEngine(args.tickers, args.capital, args.method, args.model, args.period)
+    if args.once:
+        run_id, report = engine.run_once()
+        print(f"Run {run_id}: {report['total_seconds']:.1f}s (model {report['model_seconds']:.1f}s, "
+              f"pipeline {report['wall_seconds']:.1f}s, allocate {report['allocate_seconds']:.2f}s)")
+        print(engine.store.latest(engine.config)[1].to_string(index=False))
+    else:
+        engine.run_forever(args.interval * 60)
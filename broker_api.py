@@ -1,14 +1,20 @@
 import os
 import json
-from kiteconnect import KiteConnect, KiteTicker
 from config import ZERODHA_API_KEY, ZERODHA_API_SECRET
+from instrument_master import InstrumentMaster
+from order_manager import OrderManager
+from metrics import timed, count
 
 TOKEN_FILE = "zerodha_access_token.json"
 
-kite = KiteConnect(api_key=ZERODHA_API_KEY)
+kite = None
 
 last_order_signal = {}
 
+instrument_masters = {}
+
+order_manager = None
+
 def save_access_token(token_data):
     with open(TOKEN_FILE, "w") as f:
         json.dump(token_data, f)
@@ -19,18 +25,30 @@ def load_access_token():
             return json.load(f)
     return None
 
+def get_kite():
+    # Created on first use so importing this module needs neither kiteconnect nor the token file
+    global kite
+    if kite is None:
+        from kiteconnect import KiteConnect
+
+        kite = KiteConnect(api_key=ZERODHA_API_KEY)
+        if not set_access_token_from_file():
+            print("[WARNING] Zerodha access token not loaded yet. Generate session using request token.")
+    return kite
+
 def set_access_token_from_file():
     token_data = load_access_token()
     if token_data and "access_token" in token_data:
-        kite.set_access_token(token_data["access_token"])
+        get_kite().set_access_token(token_data["access_token"])
         return True
     return False
 
 def generate_session(request_token):
     try:
-        data = kite.generate_session(request_token, api_secret=ZERODHA_API_SECRET)
+        client = get_kite()
+        data = client.generate_session(request_token, api_secret=ZERODHA_API_SECRET)
         access_token = data["access_token"]
-        kite.set_access_token(access_token)
+        client.set_access_token(access_token)
         save_access_token(data)
         print("[INFO] Zerodha session generated and access token saved.")
         return access_token
@@ -38,49 +56,62 @@ def generate_session(request_token):
         print(f"[ERROR] Failed to generate session: {e}")
         raise
 
+@timed("order_place")
 def place_order(ticker, side, quantity, product="MIS", order_type="MARKET", exchange="NSE"):
     try:
-        transaction_type = kite.TRANSACTION_TYPE_BUY if side.lower() == "buy" else kite.TRANSACTION_TYPE_SELL
-        order_id = kite.place_order(
+        client = get_kite()
+        transaction_type = client.TRANSACTION_TYPE_BUY if side.lower() == "buy" else client.TRANSACTION_TYPE_SELL
+        order_id = client.place_order(
             tradingsymbol=ticker,
             exchange=exchange,
             transaction_type=transaction_type,
             quantity=quantity,
             product=product,
             order_type=order_type,
-            variety=kite.VARIETY_REGULAR,
-            validity=kite.VALIDITY_DAY
+            variety=client.VARIETY_REGULAR,
+            validity=client.VALIDITY_DAY
         )
         print(f"[TRADE EXECUTED] {side.upper()} {quantity} shares of {ticker} | Order ID: {order_id}")
+        count("orders_placed")
         return order_id
     except Exception as e:
         print(f"[ERROR] Order placement failed for {ticker}: {e}")
+        count("orders_failed")
         return None
 
 def fetch_orders():
     try:
-        return kite.orders()
+        return get_kite().orders()
     except Exception as e:
         print(f"[ERROR] Failed to fetch orders: {e}")
         return []
 
 def fetch_positions():
     try:
-        return kite.positions()
+        return get_kite().positions()
     except Exception as e:
         print(f"[ERROR] Failed to fetch positions: {e}")
         return {}
 
+def get_instrument_master(exchange="NSE"):
+    if exchange not in instrument_masters:
+        instrument_masters[exchange] = InstrumentMaster(exchange, lambda ex: get_kite().instruments(ex))
+    return instrument_masters[exchange]
+
 def get_instrument_token(symbol, exchange="NSE"):
     try:
-        instruments = kite.instruments(exchange)
-        for inst in instruments:
-            if inst["tradingsymbol"] == symbol:
-                return inst["instrument_token"]
+        return get_instrument_master(exchange).token(symbol)
     except Exception as e:
         print(f"[ERROR] Fetching instrument token failed: {e}")
     return None
 
+def get_instrument_tokens(symbols, exchange="NSE"):
+    try:
+        return get_instrument_master(exchange).tokens(symbols)
+    except Exception as e:
+        print(f"[ERROR] Fetching instrument tokens failed: {e}")
+    return {}
+
 def can_place_order(ticker, signal):
     last_signal = last_order_signal.get(ticker)
     return last_signal != signal
@@ -99,11 +130,19 @@ def auto_place_order(ticker, signal, shares):
         print(f"[INFO] Already placed order for {ticker} signal {signal}. Skipping.")
     return None
 
+def get_order_manager():
+    global order_manager
+    if order_manager is None:
+        order_manager = OrderManager(get_kite()).start()
+    return order_manager
+
 def start_live_feed(instrument_tokens, on_ticks, on_connect=None, on_close=None):
     token_data = load_access_token()
     if not token_data or "access_token" not in token_data:
         raise Exception("Access token required — generate Zerodha session first.")
 
+    from kiteconnect import KiteTicker
+
     access_token = token_data["access_token"]
     kws = KiteTicker(ZERODHA_API_KEY, access_token)
 
@@ -115,6 +154,7 @@ def start_live_feed(instrument_tokens, on_ticks, on_connect=None, on_close=None)
             on_connect(ws, response)
 
     def _on_ticks(ws, ticks):
+        count("ticks", len(ticks))
         if on_ticks:
             on_ticks(ws, ticks)
 
@@ -129,6 +169,3 @@ def start_live_feed(instrument_tokens, on_ticks, on_connect=None, on_close=None)
 
     kws.connect(threaded=True)
     return kws
-
-if not set_access_token_from_file():
-    print("[WARNING] Zerodha access token not loaded yet. Generate session using request token.")
@@ -8,6 +8,39 @@ DEFAULT_MODELS = ["RandomForest", "XGBoost"]  # ML models to load/use
 STOP_LOSS = 0.05               # 5% stop-loss threshold
 TAKE_PROFIT = 0.1              # 10% take-profit threshold
 
+DATA_CACHE_DIR = "data_cache"  # On-disk OHLCV cache (one .npy per ticker)
+PIPELINE_WORKERS = None        # Processes for the per-ticker pipeline (None = all cores)
+PIPELINE_TASKS_PER_WORKER = 50 # Recycle worker processes after this many tickers
+MODEL_REGISTRY_DIR = "model_registry"  # Versioned trained models (joblib/Keras/Prophet JSON)
+MODEL_CACHE_SIZE = 8           # Loaded models kept in memory before LRU eviction
+INFERENCE_WINDOW_MS = 0        # Live inference batching window (0 = one batch per tick callback)
+TICK_BUFFER_SIZE = 64          # Ring buffer capacity per instrument for incoming ticks
+COALESCE_TICKS = True          # Process only the newest buffered tick per instrument
+INSTRUMENTS_DIR = "instruments" # Daily cached broker instrument dumps
+ORDER_RATE_LIMIT = 10          # Max orders per second sent to the broker
+ORDER_WORKERS = 2              # Threads placing queued orders
+ORDER_QUEUE_SIZE = 1000        # Pending order intents before new ones are rejected
+ORDER_POLL_INTERVAL = 10       # Seconds between cached orders/positions refreshes
+SENTIMENT_DB = "sentiment_cache/sentiment.db"  # Polarity scores and per-ticker news cache
+NEWS_CACHE_TTL = 900           # Seconds before a ticker's cached news is refetched
+SENTIMENT_PARALLEL_MIN = 2000  # Uncached articles needed before scoring on a process pool
+SENTIMENT_HALF_LIFE_DAYS = 3   # Half-life of the decayed rolling sentiment feature
+SCAN_MAX_STALE_DAYS = 5        # Scanner skips tickers whose last bar is older than this many days
+COV_WINDOW = 252               # Trading days in the rolling returns covariance
+COV_SHRINKAGE = 0.1            # Weight of the diagonal target in the shrunk covariance
+PAPER_SLIPPAGE_BPS = 5         # Paper broker fill slippage against the last price, in basis points
+PAPER_LATENCY = 0.2            # Simulated seconds between order placement and fill
+PAPER_TICK_INTERVAL = 1.0      # Simulated seconds between replayed tick batches
+METRICS_ENABLED = False        # Record stage timers/counters (near no-op when off)
+METRICS_FILE = "metrics/metrics.json"  # JSON snapshot written by metrics.write_json
+METRICS_PORT = 9108            # Local Prometheus text endpoint for metrics.serve
+RESULTS_DB = "results/results.db"  # Batch engine runs and allocations read by the UI
+RESULTS_KEEP_RUNS = 20         # Most recent runs kept per config; older ones are pruned on write
+SEARCH_CACHE_DIR = "search_cache"  # Hyperparameter trial results and checkpoints (resumable)
+SEARCH_ETA = 3                 # Successive-halving keep ratio (top 1/eta advance each rung)
+ENSEMBLE_WEIGHTS = {"RandomForest": 0.3, "XGBoost": 0.3, "LSTM": 0.2, "Prophet": 0.1, "Sentiment": 0.1}  # 0 disables a model
+ENSEMBLE_TREND_SCALE = 0.02    # Prophet trend mapped to probability via a logistic with this scale
+
 NEWS_API_KEY = "YOUR_NEWSAPI_KEY"
 TWITTER_BEARER_TOKEN = "YOUR_TWITTER_BEARER_TOKEN"  # Optional
 
@@ -0,0 +1,182 @@
+import os
+import json
+import tempfile
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+from config import DATA_CACHE_DIR
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+RECORD_DTYPE = np.dtype([("Date", "i8")] + [(c, "f8") for c in COLUMNS])
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "2y": 731, "5y": 1827, "10y": 3653}
+MANIFEST = "manifest.json"
+
+def period_start(period, today=None):
+    today = today or date.today()
+    if period not in PERIOD_DAYS:
+        raise ValueError(f"Unsupported period for cache: {period}")
+    return today - timedelta(days=PERIOD_DAYS[period])
+
+def normalize_ohlcv(df):
+    if df is None or df.empty:
+        return pd.DataFrame(columns=COLUMNS, index=pd.DatetimeIndex([], name="Date"))
+    if isinstance(df.columns, pd.MultiIndex):
+        # yfinance returns (Price, Ticker) columns even for a single ticker
+        level = 0 if "Close" in df.columns.get_level_values(0) else 1
+        df = df.copy()
+        df.columns = df.columns.get_level_values(level)
+    out = pd.DataFrame(index=pd.DatetimeIndex(df.index))
+    for col in COLUMNS:
+        out[col] = df[col].astype(float) if col in df.columns else np.nan
+    if out.index.tz is not None:
+        out.index = out.index.tz_localize(None)
+    out.index = out.index.normalize()
+    out.index.name = "Date"
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+def _to_records(df):
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records["Date"] = df.index.values.astype("datetime64[ns]").astype("i8")
+    for col in COLUMNS:
+        records[col] = df[col].values
+    return records
+
+
+class YFinanceSource:
+    def fetch(self, tickers, start):
+        import yfinance as yf
+
+        data = yf.download(list(tickers), start=start, interval="1d", progress=False, group_by="ticker")
+        frames = {}
+        for ticker in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if ticker not in data.columns.get_level_values(0):
+                    continue
+                frames[ticker] = normalize_ohlcv(data[ticker]).dropna(how="all")
+            else:
+                frames[ticker] = normalize_ohlcv(data).dropna(how="all")
+        return frames
+
+
+class LocalCSVSource:
+    """Offline source reading <directory>/<TICKER>.csv fixtures with a Date column."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def fetch(self, tickers, start):
+        frames = {}
+        for ticker in tickers:
+            path = os.path.join(self.directory, f"{ticker}.csv")
+            if not os.path.exists(path):
+                continue
+            df = pd.read_csv(path, index_col="Date", parse_dates=True)
+            df = normalize_ohlcv(df)
+            frames[ticker] = df[df.index >= pd.Timestamp(start)]
+        return frames
+
+
+class OHLCVCache:
+    """Per-ticker memory-mapped NumPy store of daily bars, refreshed by fetching only the missing tail."""
+
+    def __init__(self, cache_dir=DATA_CACHE_DIR, source=None):
+        self.cache_dir = cache_dir
+        self.source = source or YFinanceSource()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "bytes_read": 0, "rows_fetched": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    def _path(self, ticker):
+        return os.path.join(self.cache_dir, f"{ticker}.npy")
+
+    def _load_manifest(self):
+        path = os.path.join(self.cache_dir, MANIFEST)
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                return json.load(f)
+        return {}
+
+    def _replace(self, path, write):
+        # Unique temp file per writer; pipeline workers share the cache directory
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+    def _save_manifest(self, updated):
+        # Merge into the on-disk manifest so concurrent writers keep each other's entries
+        manifest = self._load_manifest()
+        manifest.update({t: self.manifest[t] for t in updated})
+        self.manifest = manifest
+        self._replace(os.path.join(self.cache_dir, MANIFEST),
+                      lambda f: f.write(json.dumps(manifest, indent=1).encode()))
+
+    def get(self, ticker, period="2y"):
+        return self.get_many([ticker], period)[ticker]
+
+    def get_many(self, tickers, period="2y"):
+        today = date.today()
+        start = period_start(period, today).isoformat()
+        pending = {}
+        for ticker in tickers:
+            entry = self.manifest.get(ticker)
+            if entry and entry["covered_from"] <= start and os.path.exists(self._path(ticker)):
+                if entry["checked"] == today.isoformat():
+                    self.stats["hits"] += 1
+                    continue
+                # Refetch from the last stored bar so a partial intraday bar gets replaced
+                self.stats["refreshes"] += 1
+                pending.setdefault(entry["last_date"] or start, []).append(ticker)
+            else:
+                self.stats["misses"] += 1
+                pending.setdefault(start, []).append(ticker)
+
+        updated = []
+        for fetch_start, group in pending.items():
+            fetched = self.source.fetch(group, fetch_start)
+            for ticker in group:
+                if self._store(ticker, fetched.get(ticker), fetch_start, today):
+                    updated.append(ticker)
+        if updated:
+            self._save_manifest(updated)
+        return {ticker: self._read(ticker, start) for ticker in tickers}
+
+    def _store(self, ticker, df, fetch_start, today):
+        new = _to_records(normalize_ohlcv(df))
+        if len(new) == 0:
+            # Empty or failed fetch: keep the stored bars and leave the entry unchecked so the next call retries
+            return False
+        self.stats["rows_fetched"] += len(new)
+        path = self._path(ticker)
+        entry = self.manifest.get(ticker)
+        if entry and os.path.exists(path) and entry["covered_from"] <= fetch_start:
+            old = np.load(path)
+            cutoff = np.datetime64(fetch_start, "ns").astype("i8")
+            records = np.concatenate([old[old["Date"] < cutoff], new])
+            covered_from = entry["covered_from"]
+        else:
+            records = new
+            covered_from = fetch_start
+        self._replace(path, lambda f: np.save(f, records))
+        last_date = None
+        if len(records):
+            last_date = str(np.datetime64(int(records["Date"][-1]), "ns").astype("datetime64[D]"))
+        self.manifest[ticker] = {"covered_from": covered_from, "last_date": last_date,
+                                 "checked": today.isoformat(), "rows": int(len(records))}
+        return True
+
+    def _read(self, ticker, start):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return normalize_ohlcv(None)
+        records = np.load(path, mmap_mode="r")
+        i = np.searchsorted(records["Date"], np.datetime64(start, "ns").astype("i8"))
+        part = records[i:]
+        self.stats["bytes_read"] += part.nbytes
+        df = pd.DataFrame({col: np.array(part[col]) for col in COLUMNS},
+                          index=pd.DatetimeIndex(np.array(part["Date"]).astype("datetime64[ns]"), name="Date"))
+        return df.dropna(subset=["Open", "High", "Low", "Close"])
@@ -1,17 +1,51 @@
-import yfinance as yf
-from newsapi import NewsApiClient
 from config import NEWS_API_KEY
+from data_cache import OHLCVCache
+from sentiment_service import get_sentiment_store
+from metrics import timed
 
-newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+newsapi = None
 
-def get_stock_data(ticker, period="2y"):
+ohlcv_cache = None
+
+def get_newsapi():
+    global newsapi
+    if newsapi is None:
+        from newsapi import NewsApiClient
+        newsapi = NewsApiClient(api_key=NEWS_API_KEY)
+    return newsapi
+
+def get_ohlcv_cache():
+    global ohlcv_cache
+    if ohlcv_cache is None:
+        ohlcv_cache = OHLCVCache()
+    return ohlcv_cache
+
+@timed("data_fetch")
+def get_stock_data(ticker, period="2y", use_cache=True):
+    if use_cache:
+        return get_ohlcv_cache().get(ticker, period)
+    import yfinance as yf
     data = yf.download(ticker, period=period, interval="1d", progress=False)
     return data.dropna()
 
-def get_stock_news(ticker, max_articles=5):
+def get_stock_data_batch(tickers, period="2y"):
+    return get_ohlcv_cache().get_many(tickers, period)
+
+@timed("news_fetch")
+def get_stock_news_items(ticker, max_articles=5):
+    store = get_sentiment_store()
+    cached = store.get_news(ticker, max_articles)
+    if cached is not None:
+        return cached
     try:
-        articles = newsapi.get_everything(q=ticker, language="en", sort_by="publishedAt", page_size=max_articles)
-        return [(a["title"], a["description"]) for a in articles["articles"]]
+        articles = get_newsapi().get_everything(q=ticker, language="en", sort_by="publishedAt", page_size=max_articles)
+        items = [{"title": a["title"], "description": a["description"], "published_at": a["publishedAt"]}
+                 for a in articles["articles"]]
+        store.put_news(ticker, items, max_articles)
+        return items
     except Exception as e:
         print(f"[ERROR] News fetch failed: {e}")
         return []
+
+def get_stock_news(ticker, max_articles=5):
+    return [(a["title"], a["description"]) for a in get_stock_news_items(ticker, max_articles)]
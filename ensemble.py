@@ -0,0 +1,220 @@
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+from config import ENSEMBLE_WEIGHTS, ENSEMBLE_TREND_SCALE, MODEL_REGISTRY_DIR, PIPELINE_WORKERS
+
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+TREE_MODELS = ["RandomForest", "XGBoost"]
+
+
+def _digest(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+    return h.hexdigest()
+
+
+class EnsembleScorer:
+    """Scores every weighted model for all tickers in batched calls and blends them into one up-probability.
+
+    Each model's output is cached per ticker together with a fingerprint of the
+    inputs it used (model version plus the rows/closes/articles it reads), so a
+    refresh only rescores tickers whose inputs changed for that model.
+    """
+
+    def __init__(self, weights=None, time_steps=60, prophet_periods=5, trend_scale=ENSEMBLE_TREND_SCALE,
+                 registry_root=MODEL_REGISTRY_DIR, prophet_workers=PIPELINE_WORKERS, sentiment_store=None):
+        weights = ENSEMBLE_WEIGHTS if weights is None else weights
+        self.weights = {name: w for name, w in weights.items() if w > 0}
+        self.time_steps = time_steps
+        self.prophet_periods = prophet_periods
+        self.trend_scale = trend_scale
+        self.registry_root = registry_root
+        self.prophet_workers = prophet_workers
+        self.sentiment_store = sentiment_store
+        self.models = {}
+        self._versions = {}
+        self._cache = {}
+
+    def set_model(self, name, model, scaler=None):
+        self.models[name] = (model, scaler)
+        # Bumping the version invalidates this model's cached outputs
+        self._versions[name] = self._versions.get(name, 0) + 1
+
+    def _fingerprint(self, name, df, articles):
+        version = self._versions.get(name, 0)
+        if name in TREE_MODELS:
+            return _digest(version, df[FEATURES].to_numpy(dtype=float)[-1].tobytes())
+        if name == "LSTM":
+            # The whole history, since each ticker's scaler is fitted on it
+            return _digest(version, df[FEATURES].to_numpy(dtype=float).tobytes())
+        if name == "Prophet":
+            return _digest(df.index[-1], len(df), float(df["Close"].iloc[-1]))
+        return _digest(df.index[-1], *[f"{a['published_at']}|{a['title']}" for a in articles])
+
+    def _score_trees(self, name, frames, tickers):
+        model, _ = self.models[name]
+        X = pd.DataFrame(np.vstack([frames[t][FEATURES].to_numpy(dtype=float)[-1] for t in tickers]),
+                         columns=FEATURES)
+        proba = model.predict_proba(X)
+        return proba[:, list(model.classes_).index(1)]
+
+    def _lstm_window(self, ticker, df, scalers):
+        from sklearn.preprocessing import MinMaxScaler
+
+        # Features are price levels, so each ticker is scaled on its own history as in
+        # models_lstm.train_lstm_multi; one ticker's scaler would push others out of range
+        scaler = scalers.get(ticker) if isinstance(scalers, dict) else None
+        if scaler is None:
+            scaler = MinMaxScaler().fit(df[FEATURES])
+        return scaler.transform(df[FEATURES].iloc[-self.time_steps:])
+
+    def _score_lstm(self, frames, tickers):
+        model, scalers = self.models["LSTM"]
+        probs = np.full(len(tickers), np.nan)
+        ok = [i for i, t in enumerate(tickers) if len(frames[t]) >= self.time_steps]
+        if ok:
+            windows = np.stack([self._lstm_window(tickers[i], frames[tickers[i]], scalers) for i in ok])
+            probs[ok] = model.predict(windows, verbose=0)[:, 0]
+        return probs
+
+    def _score_prophet(self, frames, tickers):
+        from prophet_runner import run_prophet
+
+        # Per-ticker fits go through the registry, so unchanged series load instead of refitting
+        trends = run_prophet({t: frames[t][["Close"]] for t in tickers}, self.prophet_periods,
+                             self.prophet_workers, self.registry_root).set_index("Ticker")["Prophet_Trend"]
+        return 1 / (1 + np.exp(-trends.reindex(tickers).to_numpy(dtype=float) / self.trend_scale))
+
+    def _score_sentiment(self, frames, tickers, news):
+        from sentiment_service import score_articles, decayed_sentiment
+
+        # One scoring call for every ticker's articles, split back afterwards
+        articles = [a for t in tickers for a in news.get(t, [])]
+        scored = score_articles(articles, self.sentiment_store)
+        probs, offset = [], 0
+        for t in tickers:
+            n = len(news.get(t, []))
+            polarity = decayed_sentiment(scored[offset:offset + n], frames[t].index[-1:]).iloc[-1]
+            probs.append(0.5 + 0.5 * polarity)
+            offset += n
+        return np.array(probs)
+
+    def _score(self, name, frames, tickers, news):
+        if name in TREE_MODELS:
+            return self._score_trees(name, frames, tickers)
+        if name == "LSTM":
+            return self._score_lstm(frames, tickers)
+        if name == "Prophet":
+            return self._score_prophet(frames, tickers)
+        if name == "Sentiment":
+            return self._score_sentiment(frames, tickers, news)
+        raise ValueError(f"Unknown ensemble model: {name}")
+
+    def refresh(self, frames, news=None):
+        """frames: {ticker: indicator DataFrame}; news: {ticker: [article dicts]} for the sentiment model.
+
+        Returns (table, report): one row per ticker with each model's up-probability,
+        Ensemble_Prob and Signal, and per-model seconds/recomputed/cached counts.
+        """
+        wall_start = time.perf_counter()
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        tickers = list(frames)
+        news = news or {}
+        probs = {}
+        report = {"models": {}, "errors": {}}
+        for name in self.weights:
+            if name in TREE_MODELS + ["LSTM"] and name not in self.models:
+                report["errors"][name] = "model not loaded"
+                continue
+            if name == "Sentiment" and not news:
+                report["errors"][name] = "no news supplied"
+                continue
+            start = time.perf_counter()
+            fingerprints = {t: self._fingerprint(name, frames[t], news.get(t, [])) for t in tickers}
+            stale = [t for t in tickers if self._cache.get((name, t), (None,))[0] != fingerprints[t]]
+            if stale:
+                try:
+                    values = self._score(name, frames, stale, news)
+                except Exception as e:
+                    report["errors"][name] = str(e)
+                    continue
+                for t, v in zip(stale, values):
+                    self._cache[(name, t)] = (fingerprints[t], float(v))
+            probs[name] = [self._cache[(name, t)][1] for t in tickers]
+            report["models"][name] = {"seconds": time.perf_counter() - start, "recomputed": len(stale),
+                                      "cached": len(tickers) - len(stale)}
+
+        table = pd.DataFrame(probs, index=pd.Index(tickers, name="Ticker"))
+        if len(table.columns):
+            P = table.to_numpy(dtype=float)
+            w = np.array([self.weights[name] for name in table.columns])
+            available = ~np.isnan(P)
+            # Weights are renormalized over the models that produced a score for each ticker
+            with np.errstate(invalid="ignore"):
+                blended = np.nansum(P * w, axis=1) / (available * w).sum(axis=1)
+        else:
+            blended = np.full(len(tickers), np.nan)
+        table["Ensemble_Prob"] = blended
+        # No model scored the ticker: no signal rather than a default SELL
+        table["Signal"] = np.where(np.isnan(blended), "HOLD", np.where(blended > 0.5, "BUY", "SELL"))
+        report["total_seconds"] = time.perf_counter() - wall_start
+        return table.reset_index(), report
+
+def load_ensemble_models(scorer, ticker, df, registry=None):
+    # Shared RF/XGBoost/LSTM models trained on one ticker through the registry, as the live app does for RF
+    from model_registry import get_model_registry
+
+    registry = registry or get_model_registry()
+    for name in TREE_MODELS + ["LSTM"]:
+        if name in scorer.weights:
+            model, scaler, _ = registry.get_or_train(name, ticker, df)
+            scorer.set_model(name, model, scaler)
+    return scorer
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    from feature_engineering import add_technical_indicators, create_labels
+    from model_registry import ModelRegistry
+    from sentiment_service import SentimentStore
+
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=520)
+    frames, news = {}, {}
+    words = ["strong", "weak", "bullish", "bearish", "record", "profit", "loss", "growth"]
+    for i in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(dates))))
+        spread = np.abs(rng.normal(0, 1.0, len(dates)))
+        raw = pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close},
+                           index=dates)
+        frames[f"SYM{i:03d}"] = create_labels(add_technical_indicators(raw))
+        news[f"SYM{i:03d}"] = [{"title": f"SYM{i:03d} " + " ".join(rng.choice(words, 4)), "description": "",
+                                "published_at": str(dates[-1 - k].date())} for k in range(5)]
+
+    root = tempfile.mkdtemp(prefix="ensemble_")
+    registry = ModelRegistry(os.path.join(root, "registry"))
+    registry_params = {"LSTM": {"epochs": 2, "batch_size": 32, "time_steps": 60}}
+    scorer = EnsembleScorer(registry_root=os.path.join(root, "registry"),
+                            sentiment_store=SentimentStore(os.path.join(root, "sentiment.db")))
+    start = time.perf_counter()
+    first = next(iter(frames))
+    for name in TREE_MODELS + ["LSTM"]:
+        model, scaler, _ = registry.get_or_train(name, first, frames[first], params=registry_params.get(name))
+        scorer.set_model(name, model, scaler)
+    print(f"Trained shared RF/XGBoost/LSTM in {time.perf_counter() - start:.1f}s")
+
+    changed = list(frames)[: max(1, n_tickers // 10)]
+    for step, label in enumerate(["cold", "unchanged", f"{len(changed)} tickers changed"]):
+        if step == 2:
+            for t in changed:
+                frames[t] = frames[t].iloc[:-1]
+        table, report = scorer.refresh(frames, news)
+        costs = ", ".join(f"{name} {r['seconds'] * 1000:.0f} ms ({r['recomputed']} scored)"
+                          for name, r in report["models"].items())
+        print(f"{label:>18}: total {report['total_seconds'] * 1000:.0f} ms | {costs}")
+    print(table.head().to_string(index=False))
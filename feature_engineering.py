@@ -1,5 +1,7 @@
 import ta
+from metrics import timed
 
+@timed("indicators")
 def add_technical_indicators(df):
     df["RSI"] = ta.momentum.RSIIndicator(df["Close"], window=14).rsi()
     df["MACD"] = ta.trend.MACD(df["Close"]).macd()
@@ -10,6 +12,7 @@ def add_technical_indicators(df):
     df["ATR"] = ta.volatility.AverageTrueRange(df["High"], df["Low"], df["Close"]).average_true_range()
     return df.dropna()
 
+@timed("labels")
 def create_labels(df):
     df["Tomorrow_Close"] = df["Close"].shift(-1)
     df["Target"] = (df["Tomorrow_Close"] > df["Close"]).astype(int)
@@ -0,0 +1,257 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import joblib
+from model_registry import short_hash
+from walk_forward import feature_matrix
+from config import SEARCH_CACHE_DIR, SEARCH_ETA, PIPELINE_WORKERS
+
+SEARCH_SPACES = {
+    "RandomForest": {"max_depth": [None, 5, 10, 20], "min_samples_leaf": [1, 5, 20],
+                     "max_features": ["sqrt", 0.5, 1.0]},
+    "XGBoost": {"max_depth": [3, 4, 6, 8], "learning_rate": [0.03, 0.1, 0.3], "subsample": [0.7, 1.0],
+                "colsample_bytree": [0.7, 1.0]},
+    "LSTM": {"units": [32, 50, 64], "dropout": [0.1, 0.2, 0.3], "batch_size": [32, 64]},
+}
+# (min, max) of the pruned resource: trees for RF/XGBoost, epochs for LSTM
+BUDGETS = {"RandomForest": (25, 400), "XGBoost": (25, 400), "LSTM": (2, 18)}
+
+_arrays = {}
+_blocks = []
+
+
+def sample_configs(model_type, n_trials, seed=0):
+    # Distinct random configs, at most the size of the grid
+    space = SEARCH_SPACES[model_type]
+    grid_size = int(np.prod([len(v) for v in space.values()]))
+    rng = np.random.default_rng(seed)
+    configs = {}
+    while len(configs) < min(n_trials, grid_size):
+        params = {k: v[rng.integers(len(v))] for k, v in space.items()}
+        configs.setdefault(short_hash(params), params)
+    return list(configs.items())
+
+def halving_rungs(min_budget, max_budget, eta=SEARCH_ETA):
+    rungs = []
+    budget = min_budget
+    while budget < max_budget:
+        rungs.append(budget)
+        budget *= eta
+    return rungs + [max_budget]
+
+def _share(arrays):
+    from multiprocessing import shared_memory
+
+    blocks, specs = [], {}
+    for name, arr in arrays.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+        blocks.append(shm)
+        specs[name] = (shm.name, arr.shape, arr.dtype.str)
+    return blocks, specs
+
+def _init_worker(specs):
+    from multiprocessing import shared_memory
+
+    # Workers map the parent's feature arrays instead of receiving copies
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _blocks.append(shm)
+        _arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _checkpoint_path(directory, model_type, trial_id, budget):
+    ext = "keras" if model_type == "LSTM" else "joblib"
+    return os.path.join(directory, f"{trial_id}_{budget}.{ext}")
+
+def _remove_checkpoints(directory, model_type, trial_ids, budget):
+    for trial_id in trial_ids:
+        path = _checkpoint_path(directory, model_type, trial_id, budget)
+        if os.path.exists(path):
+            os.remove(path)
+
+def _fit_trees(model_type, params, budget, prev_budget, previous, path):
+    from sklearn.metrics import accuracy_score
+    from models import MODEL_FACTORIES
+
+    X, y = _arrays["X"], _arrays["y"]
+    split = int(len(X) * 0.8)
+    if model_type == "RandomForest":
+        # warm_start grows only the extra trees on top of the previous rung's forest
+        model = joblib.load(previous) if previous else MODEL_FACTORIES[model_type]().set_params(warm_start=True,
+                                                                                               **params)
+        model.set_params(n_estimators=budget)
+        model.fit(X[:split], y[:split])
+    else:
+        # Boosting continues from the previous rung's booster
+        model = MODEL_FACTORIES[model_type]().set_params(n_estimators=budget - prev_budget, **params)
+        model.fit(X[:split], y[:split], xgb_model=joblib.load(previous).get_booster() if previous else None)
+    score = accuracy_score(y[split:], model.predict(X[split:]))
+    joblib.dump(model, path)
+    return score
+
+def _fit_lstm(params, budget, prev_budget, previous, path, time_steps):
+    import tensorflow as tf
+    from numpy.lib.stride_tricks import sliding_window_view
+    from models_lstm import build_lstm_model
+
+    # Same windows and labels as models_lstm.lstm_window_view, as a view over shared memory
+    scaled, target = _arrays["X_scaled"], _arrays["y"]
+    n_windows = max(len(scaled) - 1 - time_steps, 0)
+    X = sliding_window_view(scaled, time_steps, axis=0).transpose(0, 2, 1)[:n_windows]
+    y = target[time_steps:time_steps + n_windows].astype(np.float32)
+    split = int(len(X) * 0.8)
+    if previous:
+        model = tf.keras.models.load_model(previous)
+    else:
+        model = build_lstm_model((time_steps, X.shape[2]), units=params["units"], dropout=params["dropout"])
+    model.fit(X[:split], y[:split], epochs=budget, initial_epoch=prev_budget, batch_size=params["batch_size"],
+              verbose=0)
+    score = model.evaluate(X[split:], y[split:], verbose=0)[1]
+    model.save(path)
+    return float(score)
+
+def _run_trial(task):
+    model_type, trial_id, params, budget, prev_budget, directory, time_steps = task
+    previous = _checkpoint_path(directory, model_type, trial_id, prev_budget) if prev_budget else None
+    if previous and not os.path.exists(previous):
+        # Checkpoint lost (e.g. interrupted mid-write); train this rung from scratch
+        previous, prev_budget = None, 0
+    path = _checkpoint_path(directory, model_type, trial_id, budget)
+    start = time.perf_counter()
+    try:
+        if model_type == "LSTM":
+            score = _fit_lstm(params, budget, prev_budget, previous, path, time_steps)
+        else:
+            score = _fit_trees(model_type, params, budget, prev_budget, previous, path)
+        error = None
+    except Exception as e:
+        score, error = float("-inf"), str(e)
+    if previous and error is None:
+        # The previous rung's checkpoint is only needed until this one is saved
+        os.remove(previous)
+    return {"trial": trial_id, "params": params, "budget": budget, "score": float(score),
+            "seconds": time.perf_counter() - start, "error": error}
+
+def _load_results(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    done[(record["trial"], record["budget"])] = record
+    return done
+
+def search(df, model_type="RandomForest", n_trials=27, eta=SEARCH_ETA, min_budget=None, max_budget=None,
+           workers=PIPELINE_WORKERS, cache_dir=SEARCH_CACHE_DIR, seed=0, time_steps=60):
+    """Successive-halving search over SEARCH_SPACES[model_type] on df's features and Target.
+
+    Every config is scored on the last 20% of rows at the smallest budget; the top
+    1/eta move to the next rung and continue from their checkpoint rather than
+    refitting. Feature arrays live in shared memory for the worker processes.
+    Completed evaluations are appended to results.jsonl so a rerun resumes;
+    checkpoints of pruned configs are deleted after each rung and the rest once
+    the search finishes.
+    """
+    wall_start = time.perf_counter()
+    X, y = feature_matrix(df)
+    arrays = {"X": X, "y": y}
+    if model_type == "LSTM":
+        from sklearn.preprocessing import MinMaxScaler
+        arrays["X_scaled"] = MinMaxScaler().fit_transform(X).astype(np.float32)
+    lo, hi = BUDGETS[model_type]
+    rungs = halving_rungs(min_budget or lo, max_budget or hi, eta)
+    configs = sample_configs(model_type, n_trials, seed)
+    fingerprint = short_hash([X.shape, float(X.sum()), int(y.sum()), rungs, time_steps])
+    directory = os.path.join(cache_dir, model_type, fingerprint)
+    os.makedirs(directory, exist_ok=True)
+    results_path = os.path.join(directory, "results.jsonl")
+    done = _load_results(results_path)
+    report = {"model_type": model_type, "configs": len(configs), "rungs": rungs, "evaluations": 0,
+              "cached": 0, "resource_used": 0}
+    evaluated = set()
+
+    workers = workers or os.cpu_count() or 1
+    blocks, specs = _share(arrays) if workers > 1 else ([], None)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,)) \
+        if workers > 1 else None
+    if pool is None:
+        _arrays.update(arrays)
+    try:
+        survivors = configs
+        prev_budget = 0
+        for i, budget in enumerate(rungs):
+            tasks = [(model_type, tid, params, budget, prev_budget, directory, time_steps)
+                     for tid, params in survivors if (tid, budget) not in done]
+            report["cached"] += len(survivors) - len(tasks)
+            results = (as_completed([pool.submit(_run_trial, t) for t in tasks]) if pool
+                       else (_run_trial(t) for t in tasks))
+            with open(results_path, "a") as f:
+                for result in results:
+                    record = result.result() if pool else result
+                    # Failed trials rank last in this run but are not saved, so a rerun retries them
+                    if record["error"]:
+                        print(f"[ERROR] Trial {record['trial']} at budget {budget} failed: {record['error']}")
+                    else:
+                        f.write(json.dumps(record) + "\n")
+                        f.flush()
+                    done[(record["trial"], budget)] = record
+                    evaluated.add(record["trial"])
+                    report["evaluations"] += 1
+                    report["resource_used"] += budget - prev_budget
+            if i == len(rungs) - 1:
+                # Search finished: no rung continues from these any more
+                _remove_checkpoints(directory, model_type, [tid for tid, _ in survivors], budget)
+                break
+            keep = max(1, len(survivors) // eta)
+            ranked = sorted(survivors, key=lambda c: done[(c[0], budget)]["score"], reverse=True)
+            survivors = ranked[:keep]
+            _remove_checkpoints(directory, model_type, [tid for tid, _ in ranked[keep:]], budget)
+            prev_budget = budget
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+        _arrays.clear()
+
+    leaderboard = pd.DataFrame([dict(r["params"], Trial=r["trial"], Budget=r["budget"], Score=r["score"])
+                                for (tid, _), r in done.items() if tid in dict(configs)])
+    leaderboard = leaderboard.sort_values(["Budget", "Score"], ascending=False).reset_index(drop=True)
+    best = leaderboard.iloc[0]
+    wall = time.perf_counter() - wall_start
+    report.update(
+        best_params=dict(configs)[best["Trial"]], best_score=float(best["Score"]), best_budget=int(best["Budget"]),
+        # Only trials trained in this run count; ones answered from results.jsonl cost nothing
+        wall_seconds=wall, trials_per_hour=len(evaluated) / wall * 3600,
+        evaluations_per_hour=report["evaluations"] / wall * 3600 if report["evaluations"] else 0.0,
+        # Fraction of the budget a full grid (every config at max budget) would have spent
+        resource_fraction=report["resource_used"] / (len(configs) * rungs[-1]),
+    )
+    return leaderboard, report
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    from feature_engineering import add_technical_indicators, create_labels
+
+    model_type = sys.argv[1] if len(sys.argv) > 1 else "RandomForest"
+    rng = np.random.default_rng(0)
+    n = 3000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    spread = np.abs(rng.normal(0, 1.0, n))
+    df = pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close})
+    df = create_labels(add_technical_indicators(df))
+    cache_dir = tempfile.mkdtemp(prefix="search_cache_")
+    for label in ("fresh", "resumed"):
+        leaderboard, report = search(df, model_type, n_trials=18 if model_type == "LSTM" else 27,
+                                     cache_dir=cache_dir)
+        print(f"{label}: {report['configs']} configs over rungs {report['rungs']} in {report['wall_seconds']:.1f}s "
+              f"-> {report['trials_per_hour']:,.0f} trials/hour; {report['evaluations']} evaluations run, "
+              f"{report['cached']} from cache, {report['resource_fraction']:.0%} of full-grid budget")
+    print(f"best {report['best_params']} score {report['best_score']:.3f} at {report['best_budget']}")
@@ -0,0 +1,118 @@
+import time
+import threading
+from collections import Counter, deque
+import numpy as np
+from metrics import timer
+
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+
+
+class InferenceScheduler:
+    """Collects per-ticker feature rows and scores them with one batched model call.
+
+    With window_ms=0 the caller flushes at the end of each tick batch; otherwise a
+    background thread flushes every window_ms. on_signal(ticker, signal, prob_up, row)
+    is called once per ticker per flush with the latest row for that ticker.
+    """
+
+    def __init__(self, model, on_signal, window_ms=0, max_latency_samples=10000):
+        self.model = model
+        self.on_signal = on_signal
+        self.window_ms = window_ms
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=max_latency_samples)
+        self.batch_sizes = Counter()
+        self.rows_scored = 0
+        self.rows_coalesced = 0
+        self._stop = threading.Event()
+        self._thread = None
+        if window_ms > 0:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def submit(self, ticker, row, received_at=None):
+        received_at = time.perf_counter() if received_at is None else received_at
+        with self._lock:
+            if ticker in self._pending:
+                # Keep the first arrival time so latency covers the whole wait
+                received_at = self._pending[ticker][1]
+                self.rows_coalesced += 1
+            self._pending[ticker] = (row, received_at)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        tickers = list(pending)
+        X = np.array([[pending[t][0][f] for f in FEATURES] for t in tickers], dtype=float)
+        with timer("inference_batch"):
+            if hasattr(self.model, "predict_proba"):
+                proba = self.model.predict_proba(X)
+                labels = np.asarray(self.model.classes_)[proba.argmax(axis=1)]
+                up_col = list(self.model.classes_).index(1) if 1 in self.model.classes_ else None
+                prob_up = proba[:, up_col] if up_col is not None else np.zeros(len(tickers))
+            else:
+                labels = np.asarray(self.model.predict(X))
+                prob_up = labels.astype(float)
+
+        self.batch_sizes[len(tickers)] += 1
+        self.rows_scored += len(tickers)
+        for ticker, label, p in zip(tickers, labels, prob_up):
+            row, received_at = pending[ticker]
+            self.on_signal(ticker, "BUY" if label == 1 else "SELL", float(p), row)
+            self._latencies.append(time.perf_counter() - received_at)
+        return len(tickers)
+
+    def _run(self):
+        while not self._stop.wait(self.window_ms / 1000.0):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Batched inference failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        if not self._latencies:
+            return {f"p{p}": 0.0 for p in percentiles}
+        values = np.percentile(np.fromiter(self._latencies, dtype=float), percentiles) * 1000
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    def stats(self):
+        return {
+            "rows_scored": self.rows_scored,
+            "rows_coalesced": self.rows_coalesced,
+            "batches": sum(self.batch_sizes.values()),
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "latency_ms": self.latency_percentiles(),
+        }
+
+
+if __name__ == "__main__":
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=200, random_state=42).fit(
+        rng.normal(size=(1000, len(FEATURES))), rng.integers(0, 2, 1000))
+    rows = [dict(zip(FEATURES, r)) for r in rng.normal(size=(500, len(FEATURES)))]
+
+    start = time.perf_counter()
+    for row in rows:
+        model.predict(np.array([[row[f] for f in FEATURES]]))
+    per_row = time.perf_counter() - start
+
+    scheduler = InferenceScheduler(model, lambda *args: None)
+    start = time.perf_counter()
+    for i, row in enumerate(rows):
+        scheduler.submit(f"SYM{i}", row)
+    scheduler.flush()
+    batched = time.perf_counter() - start
+    print(f"500 tickers: per-row predict {per_row * 1000:.0f} ms, one batch {batched * 1000:.0f} ms "
+          f"({per_row / batched:.0f}x)")
+    print(scheduler.stats())
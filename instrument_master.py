@@ -0,0 +1,74 @@
+import os
+import json
+from datetime import date
+from config import INSTRUMENTS_DIR
+
+
+class InstrumentMaster:
+    """Daily on-disk copy of the broker instrument dump with symbol<->token indexes.
+
+    fetch(exchange) must return the kite.instruments() rows; it is only called
+    when today's file is missing. Nothing is read until the first lookup.
+    """
+
+    def __init__(self, exchange, fetch, directory=INSTRUMENTS_DIR):
+        self.exchange = exchange
+        self.fetch = fetch
+        self.path = os.path.join(directory, f"{exchange}.json")
+        self._symbol_to_token = None
+        self._token_to_symbol = None
+        self._loaded_on = None
+
+    def _read_file(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _download(self):
+        rows = self.fetch(self.exchange)
+        data = {
+            "exchange": self.exchange,
+            "fetched_on": date.today().isoformat(),
+            "symbols": {row["tradingsymbol"]: row["instrument_token"] for row in rows},
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(self.path + ".tmp", self.path)
+        return data
+
+    def load(self, force_refresh=False):
+        today = date.today().isoformat()
+        # The file is always read first so a failed forced refresh can still fall back to it
+        data = self._read_file()
+        if force_refresh or data is None or data.get("fetched_on") != today:
+            try:
+                data = self._download()
+            except Exception as e:
+                if data is None:
+                    raise
+                print(f"[WARNING] Instrument refresh failed, using dump from {data['fetched_on']}: {e}")
+        self._symbol_to_token = data["symbols"]
+        self._token_to_symbol = {token: symbol for symbol, token in self._symbol_to_token.items()}
+        self._loaded_on = today
+
+    def _ensure_loaded(self):
+        if self._symbol_to_token is None or self._loaded_on != date.today().isoformat():
+            self.load()
+
+    def token(self, symbol):
+        self._ensure_loaded()
+        return self._symbol_to_token.get(symbol)
+
+    def symbol(self, token):
+        self._ensure_loaded()
+        return self._token_to_symbol.get(token)
+
+    def tokens(self, symbols):
+        self._ensure_loaded()
+        return {s: self._symbol_to_token[s] for s in symbols if s in self._symbol_to_token}
+
+    def symbols(self, tokens):
+        self._ensure_loaded()
+        return {t: self._token_to_symbol[t] for t in tokens if t in self._token_to_symbol}
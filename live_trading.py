@@ -0,0 +1,90 @@
+import time
+from streaming_indicators import StreamingIndicatorEngine
+from inference_scheduler import InferenceScheduler
+from risk_management import PositionBook
+from config import INFERENCE_WINDOW_MS
+
+STAGES = ["indicators", "inference", "risk"]
+
+
+class LiveTrader:
+    """The live tick path: streaming indicators, batched inference, signal orders and risk exits.
+
+    on_ticks(ticks) is the TickIngestor handler. Orders go through the OrderManager
+    queue and signals, trade times and closed positions are only updated once the
+    broker acknowledges them. clock supplies "now" for cooldowns, so the paper
+    simulator can drive the same code on simulated time.
+    """
+
+    def __init__(self, model, token_to_ticker, risk_manager, order_manager, window_ms=INFERENCE_WINDOW_MS,
+                 clock=time.time, stage_seconds=None):
+        self.token_to_ticker = token_to_ticker
+        self.tickers = list(token_to_ticker.values())
+        self.risk_manager = risk_manager
+        self.order_manager = order_manager
+        self.clock = clock
+        self.stage_seconds = stage_seconds
+        self.engine = StreamingIndicatorEngine()
+        self.scheduler = InferenceScheduler(model, self.on_signal, window_ms=window_ms)
+        self.book = PositionBook.from_risk_manager(risk_manager)
+        self.signals = {t: "N/A" for t in self.tickers}
+        self.prices = {t: 0.0 for t in self.tickers}
+        self.allocation = {}
+
+    def on_ticks(self, ticks):
+        start = time.perf_counter()
+        seen, prices = [], []
+        for tick in ticks:
+            ticker = self.token_to_ticker.get(tick["instrument_token"])
+            if ticker is None:
+                continue
+            price = tick["last_price"]
+            # Indicators are updated incrementally; None until enough ticks for SMA_200
+            row = self.engine.update(ticker, price)
+            self.prices[ticker] = price
+            if row is not None:
+                self.scheduler.submit(ticker, row, received_at=tick.get("received_at", start))
+            seen.append(ticker)
+            prices.append(price)
+        t1 = time.perf_counter()
+        # One predict for every ticker updated in this tick batch
+        if self.scheduler.window_ms <= 0:
+            self.scheduler.flush()
+        t2 = time.perf_counter()
+        # One risk pass over every open position for the whole batch
+        if seen:
+            for intent in self.book.on_prices(self.book.indices(seen), prices, now=self.clock()):
+                self.order_manager.submit(intent["symbol"], intent["side"], intent["quantity"],
+                                          callback=self.on_exit_done)
+        if self.stage_seconds is not None:
+            for stage, seconds in zip(STAGES, (t1 - start, t2 - t1, time.perf_counter() - t2)):
+                self.stage_seconds.setdefault(stage, []).append(seconds)
+
+    def on_signal(self, ticker, new_signal, prob_up, row):
+        # Only trade if the signal changed and the cooldown has passed
+        if new_signal != self.signals.get(ticker, "N/A") and self.risk_manager.can_trade(ticker, now=self.clock()):
+            allocation = self.allocation.get(ticker, self.risk_manager.capital / len(self.tickers))
+            shares = max(1, int(allocation / row["Close"]))
+            self.order_manager.submit_signal(ticker, new_signal, shares, callback=self.on_order_done)
+
+    def on_order_done(self, intent):
+        if intent.order_id:
+            now = self.clock()
+            self.signals[intent.ticker] = intent.signal
+            self.risk_manager.update_trade_time(intent.ticker, now=now)
+            self.book.record_trade(intent.ticker, now=now)
+
+    def on_exit_done(self, intent):
+        if intent.order_id:
+            now = self.clock()
+            self.book.close(intent.ticker, now=now)
+            self.risk_manager.update_trade_time(intent.ticker, now=now)
+        else:
+            self.book.release(intent.ticker)
+
+    def sync_positions(self):
+        positions = self.order_manager.positions()
+        if positions:
+            # Sync even when the broker reports nothing, so positions closed elsewhere drop out of the book
+            self.book.sync(positions.get("net") or [], now=self.clock())
+        return positions
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import METRICS_ENABLED, METRICS_FILE, METRICS_PORT
+
+# Upper bounds in seconds, 50us to 60s
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+enabled = METRICS_ENABLED
+
+
+class Histogram:
+    """Prometheus-style bucket counts plus a window of recent samples for live percentiles."""
+
+    def __init__(self, window=2048):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentiles(self, percentiles=(50, 99)):
+        if not self.recent:
+            return {f"p{p}": 0.0 for p in percentiles}
+        values = np.percentile(np.fromiter(self.recent, dtype=float), percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+
+histograms = {}
+counters = {}
+_servers = {}
+_lock = threading.Lock()
+
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def reset():
+    with _lock:
+        histograms.clear()
+        counters.clear()
+
+def observe(name, seconds):
+    if not enabled:
+        return
+    with _lock:
+        hist = histograms.get(name)
+        if hist is None:
+            hist = histograms[name] = Histogram()
+        hist.observe(seconds)
+
+def count(name, n=1):
+    if not enabled:
+        return
+    with _lock:
+        counters[name] = counters.get(name, 0) + n
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+def timer(name):
+    # with timer("stage"): ... ; a shared no-op object when metrics are off
+    return _Timer(name) if enabled else _NULL_TIMER
+
+def timed(name):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def snapshot():
+    with _lock:
+        return {
+            "timestamp": time.time(),
+            "counters": dict(counters),
+            "histograms": {name: {"count": h.count, "sum": h.sum, "buckets": list(h.buckets),
+                                  **h.percentiles()}
+                           for name, h in histograms.items()},
+        }
+
+def summary_rows():
+    # One row per stage for the Streamlit panel
+    rows = []
+    for name, h in sorted(snapshot()["histograms"].items()):
+        rows.append({"Stage": name, "Count": h["count"], "p50 ms": h["p50"] * 1000, "p99 ms": h["p99"] * 1000,
+                     "Total s": h["sum"]})
+    return rows
+
+def to_prometheus(prefix="trading"):
+    snap = snapshot()
+    lines = [f"# TYPE {prefix}_events_total counter"]
+    for name, value in sorted(snap["counters"].items()):
+        lines.append(f'{prefix}_events_total{{name="{name}"}} {value}')
+    lines.append(f"# TYPE {prefix}_stage_seconds histogram")
+    for name, h in sorted(snap["histograms"].items()):
+        cumulative = np.cumsum(h["buckets"])
+        for bound, c in zip(list(BUCKETS) + ["+Inf"], cumulative):
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {c}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {h["sum"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {h["count"]}')
+    return "\n".join(lines) + "\n"
+
+def write_json(path=METRICS_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp, path)
+    return path
+
+def serve(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve to_prometheus() at /metrics on a daemon thread; returns the server.
+
+    One server per (host, port) per process: later calls, e.g. from other Streamlit
+    sessions, get the running server instead of failing to bind the port again.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    with _lock:
+        httpd = _servers.get((host, port))
+        if httpd is None:
+            httpd = _servers[(host, port)] = ThreadingHTTPServer((host, port), Handler)
+            threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    @timed("noop")
+    def noop():
+        return None
+
+    def bare():
+        return None
+
+    n = 200_000
+    results = {}
+    for label, on in [("baseline", None), ("disabled", False), ("enabled", True)]:
+        enable(bool(on))
+        fn = bare if on is None else noop
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        results[label] = (time.perf_counter() - start) / n * 1e9
+        start = time.perf_counter()
+        for _ in range(n):
+            with timer("block"):
+                pass
+        if on is not None:
+            results[label + " (with timer)"] = (time.perf_counter() - start) / n * 1e9
+    for label, ns in results.items():
+        print(f"{label:>22}: {ns:6.0f} ns/call")
+    count("orders_placed", 3)
+    print(summary_rows())
+    print(to_prometheus().splitlines()[:3])
+    print(f"JSON snapshot: {write_json(os.path.join(tempfile.mkdtemp(), 'metrics.json'))}")
@@ -0,0 +1,154 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+import joblib
+from config import MODEL_REGISTRY_DIR, MODEL_CACHE_SIZE
+
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+
+DEFAULT_PARAMS = {
+    "RandomForest": {"n_estimators": 200, "random_state": 42},
+    "XGBoost": {"eval_metric": "logloss"},
+    "LSTM": {"epochs": 30, "batch_size": 32, "time_steps": 60},
+    "Prophet": {"daily_seasonality": True},
+}
+
+def short_hash(obj):
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode()).hexdigest()[:12]
+
+def model_key(model_type, ticker, data_end, features=FEATURES, params=None):
+    params = DEFAULT_PARAMS.get(model_type, {}) if params is None else params
+    return f"{model_type}/{ticker}/{short_hash(list(features))}_{data_end}_{short_hash(params)}"
+
+def _data_end(df):
+    return str(df.index[-1])[:10]
+
+def _train(model_type, df, params):
+    if model_type == "RandomForest":
+        from models import train_random_forest
+        model, acc = train_random_forest(df, params)
+        return model, None, {"accuracy": acc}
+    if model_type == "XGBoost":
+        from models import train_xgboost
+        model, acc = train_xgboost(df, params)
+        return model, None, {"accuracy": acc}
+    if model_type == "LSTM":
+        from models_lstm import train_lstm
+        model, scaler, acc = train_lstm(df, **params)
+        return model, scaler, {"accuracy": float(acc)}
+    if model_type == "Prophet":
+        from models_prophet import train_prophet
+        return train_prophet(df, params=params), None, {}
+    raise ValueError(f"Unknown model type: {model_type}")
+
+
+class ModelRegistry:
+    """Versioned on-disk store of trained models with a small LRU of loaded ones."""
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, max_in_memory=MODEL_CACHE_SIZE):
+        self.root = root
+        self.max_in_memory = max_in_memory
+        self._loaded = OrderedDict()
+        self.stats = {"hits": 0, "loads": 0, "fits": 0, "evictions": 0}
+
+    def _dir(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key):
+        return os.path.exists(os.path.join(self._dir(key), "meta.json"))
+
+    def metadata(self, key):
+        with open(os.path.join(self._dir(key), "meta.json"), "r") as f:
+            return json.load(f)
+
+    def versions(self, model_type, ticker):
+        base = os.path.join(self.root, model_type, ticker)
+        if not os.path.isdir(base):
+            return []
+        return sorted(f"{model_type}/{ticker}/{name}" for name in os.listdir(base)
+                      if os.path.exists(os.path.join(base, name, "meta.json")))
+
+    def latest(self, model_type, ticker, features=FEATURES, params=None, before=None):
+        # Most recent version with the same feature set and params, optionally with data_end < before
+        params = DEFAULT_PARAMS.get(model_type, {}) if params is None else params
+        prefix = f"{model_type}/{ticker}/{short_hash(list(features))}_"
+        suffix = f"_{short_hash(params)}"
+        keys = [k for k in self.versions(model_type, ticker) if k.startswith(prefix) and k.endswith(suffix)]
+        if before is not None:
+            keys = [k for k in keys if k[len(prefix):-len(suffix)] < before]
+        return keys[-1] if keys else None
+
+    def save(self, model_type, ticker, model, data_end, scaler=None, features=FEATURES, params=None, metrics=None):
+        key = model_key(model_type, ticker, data_end, features, params)
+        path = self._dir(key)
+        os.makedirs(path, exist_ok=True)
+        if model_type == "LSTM":
+            model.save(os.path.join(path, "model.keras"))
+        elif model_type == "Prophet":
+            from prophet.serialize import model_to_json
+            with open(os.path.join(path, "model.json"), "w") as f:
+                f.write(model_to_json(model))
+        else:
+            # Uncompressed so the tree arrays can be memory-mapped on load
+            joblib.dump(model, os.path.join(path, "model.joblib"))
+        if scaler is not None:
+            joblib.dump(scaler, os.path.join(path, "scaler.joblib"))
+        meta = {
+            "model_type": model_type, "ticker": ticker, "data_end": data_end, "features": list(features),
+            "params": DEFAULT_PARAMS.get(model_type, {}) if params is None else params,
+            "metrics": metrics or {}, "has_scaler": scaler is not None,
+        }
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=1, default=str)
+        self._remember(key, (model, scaler))
+        return key
+
+    def load(self, key):
+        if key in self._loaded:
+            self.stats["hits"] += 1
+            self._loaded.move_to_end(key)
+            return self._loaded[key]
+        path = self._dir(key)
+        meta = self.metadata(key)
+        if meta["model_type"] == "LSTM":
+            from tensorflow.keras.models import load_model
+            model = load_model(os.path.join(path, "model.keras"))
+        elif meta["model_type"] == "Prophet":
+            from prophet.serialize import model_from_json
+            with open(os.path.join(path, "model.json"), "r") as f:
+                model = model_from_json(f.read())
+        else:
+            model = joblib.load(os.path.join(path, "model.joblib"), mmap_mode="r")
+        scaler = joblib.load(os.path.join(path, "scaler.joblib")) if meta["has_scaler"] else None
+        self.stats["loads"] += 1
+        self._remember(key, (model, scaler))
+        return model, scaler
+
+    def _remember(self, key, entry):
+        self._loaded[key] = entry
+        self._loaded.move_to_end(key)
+        while len(self._loaded) > self.max_in_memory:
+            self._loaded.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get_or_train(self, model_type, ticker, df, params=None):
+        params = DEFAULT_PARAMS.get(model_type, {}) if params is None else params
+        data_end = _data_end(df)
+        key = model_key(model_type, ticker, data_end, FEATURES, params)
+        if self.exists(key):
+            model, scaler = self.load(key)
+            return model, scaler, self.metadata(key)["metrics"]
+        model, scaler, metrics = _train(model_type, df, params)
+        self.stats["fits"] += 1
+        self.save(model_type, ticker, model, data_end, scaler=scaler, params=params, metrics=metrics)
+        return model, scaler, metrics
+
+
+model_registry = None
+
+def get_model_registry():
+    global model_registry
+    if model_registry is None:
+        model_registry = ModelRegistry()
+    return model_registry
@@ -1,6 +1,4 @@
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-import xgboost as xgb
+from metrics import timed
 
 FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
 
@@ -10,20 +8,38 @@ def prepare_data(df):
     split = int(len(df) * 0.8)
     return X[:split], X[split:], y[:split], y[split:]
 
-def train_random_forest(df):
+def make_random_forest(**params):
+    # Backends are imported on first use so importing this module stays cheap
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(**dict({"n_estimators": 200, "random_state": 42}, **params))
+
+def make_xgboost(**params):
+    import xgboost as xgb
+    return xgb.XGBClassifier(**dict({"use_label_encoder": False, "eval_metric": "logloss"}, **params))
+
+MODEL_FACTORIES = {"RandomForest": make_random_forest, "XGBoost": make_xgboost}
+
+@timed("train_random_forest")
+def train_random_forest(df, params=None):
+    from sklearn.metrics import accuracy_score
+
     X_train, X_test, y_train, y_test = prepare_data(df)
-    model = RandomForestClassifier(n_estimators=200, random_state=42)
+    model = make_random_forest(**(params or {}))
     model.fit(X_train, y_train)
     acc = accuracy_score(y_test, model.predict(X_test))
     return model, acc
 
-def train_xgboost(df):
+@timed("train_xgboost")
+def train_xgboost(df, params=None):
+    from sklearn.metrics import accuracy_score
+
     X_train, X_test, y_train, y_test = prepare_data(df)
-    model = xgb.XGBClassifier(use_label_encoder=False, eval_metric="logloss")
+    model = make_xgboost(**(params or {}))
     model.fit(X_train, y_train)
     acc = accuracy_score(y_test, model.predict(X_test))
     return model, acc
 
+@timed("inference")
 def predict_signal(model, latest_row):
     pred = model.predict(latest_row[FEATURES].values.reshape(1, -1))
     return "BUY" if pred[0] == 1 else "SELL"
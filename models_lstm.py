@@ -1,13 +1,30 @@
+import time
+import tracemalloc
 import numpy as np
 import pandas as pd
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping
-from sklearn.preprocessing import MinMaxScaler
+from numpy.lib.stride_tricks import sliding_window_view
 
 FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
 
+def lstm_window_view(df, time_steps=60):
+    # Zero-copy (n_windows, time_steps, n_features) view; window k covers rows k..k+time_steps-1
+    # and is labelled with Target at row k+time_steps, matching the original loop bounds
+    from sklearn.preprocessing import MinMaxScaler
+
+    scaler = MinMaxScaler()
+    data = scaler.fit_transform(df[FEATURES])
+    n_windows = max(len(data) - 1 - time_steps, 0)
+    X = sliding_window_view(data, time_steps, axis=0).transpose(0, 2, 1)[:n_windows]
+    y = (df["Target"].values[time_steps:time_steps + n_windows] == 1).astype(int)
+    return X, y, scaler
+
 def prepare_lstm_data(df, time_steps=60):
+    X, y, scaler = lstm_window_view(df, time_steps)
+    return np.ascontiguousarray(X), y, scaler
+
+def _prepare_lstm_data_loop(df, time_steps=60):
+    from sklearn.preprocessing import MinMaxScaler
+
     scaler = MinMaxScaler()
     data = scaler.fit_transform(df[FEATURES])
     X, y = [], []
@@ -17,32 +34,120 @@ def prepare_lstm_data(df, time_steps=60):
     X, y = np.array(X), np.array(y)
     return X, y, scaler
 
-def build_lstm_model(input_shape):
+def iter_window_batches(views, batch_size=32, shuffle=True, seed=None):
+    # Only one batch is materialized at a time; batches never mix tickers,
+    # but their order is shuffled across tickers
+    rng = np.random.default_rng(seed)
+    batches = []
+    for t, (X, _) in enumerate(views):
+        order = rng.permutation(len(X)) if shuffle else np.arange(len(X))
+        batches.extend((t, order[i:i + batch_size]) for i in range(0, len(order), batch_size))
+    if shuffle:
+        rng.shuffle(batches)
+    for t, idx in batches:
+        X, y = views[t]
+        yield X[idx].astype(np.float32), y[idx].astype(np.float32)
+
+def make_lstm_dataset(views, batch_size=32, shuffle=True, seed=None):
+    import tensorflow as tf
+
+    time_steps, n_features = views[0][0].shape[1:]
+    n_batches = sum(-(-len(X) // batch_size) for X, _ in views)
+    return tf.data.Dataset.from_generator(
+        lambda: iter_window_batches(views, batch_size, shuffle, seed),
+        output_signature=(
+            tf.TensorSpec(shape=(None, time_steps, n_features), dtype=tf.float32),
+            tf.TensorSpec(shape=(None,), dtype=tf.float32),
+        ),
+    ).apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
+
+def build_lstm_model(input_shape, units=50, dropout=0.2):
+    # TensorFlow is only imported once an LSTM is actually built
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+
     model = Sequential()
-    model.add(LSTM(units=50, return_sequences=True, input_shape=input_shape))
-    model.add(Dropout(0.2))
-    model.add(LSTM(units=50))
-    model.add(Dropout(0.2))
+    model.add(LSTM(units=units, return_sequences=True, input_shape=input_shape))
+    model.add(Dropout(dropout))
+    model.add(LSTM(units=units))
+    model.add(Dropout(dropout))
     model.add(Dense(1, activation="sigmoid"))
     model.compile(loss="binary_crossentropy", optimizer="adam", metrics=["accuracy"])
     return model
 
-def train_lstm(df, epochs=30, batch_size=32):
-    X, y, scaler = prepare_lstm_data(df)
+def train_lstm(df, epochs=30, batch_size=32, time_steps=60, units=50, dropout=0.2):
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    X, y, scaler = prepare_lstm_data(df, time_steps)
     if len(X) == 0:
         raise ValueError("Not enough data for LSTM training")
     split = int(len(X) * 0.8)
     X_train, X_val = X[:split], X[split:]
     y_train, y_val = y[:split], y[split:]
-    model = build_lstm_model((X.shape[1], X.shape[2]))
+    model = build_lstm_model((X.shape[1], X.shape[2]), units=units, dropout=dropout)
     early_stop = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True)
     model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size,
               validation_data=(X_val, y_val), callbacks=[early_stop], verbose=0)
     val_acc = model.evaluate(X_val, y_val, verbose=0)[1]
     return model, scaler, val_acc
 
+def train_lstm_multi(frames, time_steps=60, epochs=30, batch_size=32):
+    from tensorflow.keras.callbacks import EarlyStopping
+
+    # frames: {ticker: df}; each ticker keeps its own scaler and the last 20% of its windows for validation
+    train_views, val_views, scalers = [], [], {}
+    for ticker, df in frames.items():
+        X, y, scaler = lstm_window_view(df, time_steps)
+        if len(X) == 0:
+            continue
+        split = int(len(X) * 0.8)
+        train_views.append((X[:split], y[:split]))
+        val_views.append((X[split:], y[split:]))
+        scalers[ticker] = scaler
+    if not scalers:
+        raise ValueError("Not enough data for LSTM training")
+    model = build_lstm_model((time_steps, len(FEATURES)))
+    early_stop = EarlyStopping(monitor="val_loss", patience=5, restore_best_weights=True)
+    val_ds = make_lstm_dataset(val_views, batch_size, shuffle=False)
+    model.fit(make_lstm_dataset(train_views, batch_size), epochs=epochs,
+              validation_data=val_ds, callbacks=[early_stop], verbose=0)
+    val_acc = model.evaluate(val_ds, verbose=0)[1]
+    return model, scalers, val_acc
+
 def predict_lstm(model, scaler, recent_data):
     data_scaled = scaler.transform(recent_data[FEATURES])
     X = np.expand_dims(data_scaled, axis=0)  # (1, time_steps, features)
     pred = model.predict(X)
     return "BUY" if pred[0][0] > 0.5 else "SELL"
+
+def benchmark_window_prep(df, time_steps=60, repeats=5):
+    results = {}
+    for name, fn in [("loop", _prepare_lstm_data_loop), ("view", lstm_window_view),
+                     ("contiguous", prepare_lstm_data)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(repeats):
+            X, y, _ = fn(df, time_steps)
+        elapsed = (time.perf_counter() - start) / repeats
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results[name] = {"seconds": elapsed, "peak_mb": peak / 2**20, "windows_per_sec": len(X) / elapsed}
+    X_loop, y_loop, _ = _prepare_lstm_data_loop(df, time_steps)
+    X_view, y_view, _ = lstm_window_view(df, time_steps)
+    results["identical"] = bool(np.array_equal(X_loop, X_view) and np.array_equal(y_loop, y_view))
+    return results
+
+if __name__ == "__main__":
+    from feature_engineering import add_technical_indicators, create_labels
+
+    rng = np.random.default_rng(0)
+    n = 5000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.5, n))
+    df = pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close})
+    df = create_labels(add_technical_indicators(df))
+    results = benchmark_window_prep(df)
+    print(f"{len(df)} rows, outputs identical: {results.pop('identical')}")
+    for name, r in results.items():
+        print(f"{name:>10}: {r['seconds'] * 1000:8.1f} ms  peak {r['peak_mb']:7.1f} MiB  "
+              f"{r['windows_per_sec']:,.0f} windows/sec")
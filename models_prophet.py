@@ -1,20 +1,35 @@
-from prophet import Prophet
+import numpy as np
 import pandas as pd
 
 def prepare_prophet_data(df):
     df_prophet = pd.DataFrame()
     df_prophet["ds"] = df.index
-    df_prophet["y"] = df["Close"]
+    df_prophet["y"] = np.asarray(df["Close"], dtype=float).ravel()
     return df_prophet
 
-def train_prophet(df):
+def train_prophet(df, init=None, params=None):
+    from prophet import Prophet
+
     df_prophet = prepare_prophet_data(df)
-    model = Prophet(daily_seasonality=True)
-    model.fit(df_prophet)
+    model = Prophet(**(params or {"daily_seasonality": True}))
+    if init is None:
+        model.fit(df_prophet)
+    else:
+        model.fit(df_prophet, init=init)
     return model
 
+def warm_start_params(model):
+    # Fitted parameters of a previous model, in the form Prophet.fit(init=...) expects
+    params = {}
+    for name in ["k", "m", "sigma_obs"]:
+        params[name] = model.params[name][0][0] if model.mcmc_samples == 0 else np.mean(model.params[name])
+    for name in ["delta", "beta"]:
+        params[name] = model.params[name][0] if model.mcmc_samples == 0 else np.mean(model.params[name], axis=0)
+    return params
+
 def predict_prophet_trend(model, periods=5):
-    future = model.make_future_dataframe(periods=periods)
+    # Only the forecast horizon is predicted; history rows are not needed for the trend
+    future = model.make_future_dataframe(periods=periods, include_history=False)
     forecast = model.predict(future)
     forecast_period = forecast.tail(periods)
     trend = (forecast_period["yhat"].iloc[-1] - forecast_period["yhat"].iloc[0]) / forecast_period["yhat"].iloc[0]
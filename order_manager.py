@@ -0,0 +1,312 @@
+import json
+import time
+import queue
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from requests.adapters import HTTPAdapter
+from metrics import timer, count
+from config import ORDER_RATE_LIMIT, ORDER_WORKERS, ORDER_QUEUE_SIZE, ORDER_POLL_INTERVAL
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class OrderIntent:
+    def __init__(self, ticker, side, quantity, signal=None, callback=None, product="MIS",
+                 order_type="MARKET", exchange="NSE"):
+        self.ticker = ticker
+        self.side = side
+        self.quantity = quantity
+        self.signal = signal
+        self.callback = callback
+        self.product = product
+        self.order_type = order_type
+        self.exchange = exchange
+        self.created_at = time.perf_counter()
+        self.order_id = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class OrderManager:
+    """Places orders from a queue on worker threads, rate limited by a token bucket.
+
+    Each worker has its own queue and a ticker always maps to the same worker, so
+    orders for one symbol reach the broker one at a time and in submission order.
+    Orders and positions are polled every poll_interval seconds and served from
+    cache, so UI renders never hit the broker directly.
+    """
+
+    def __init__(self, client, rate=ORDER_RATE_LIMIT, workers=ORDER_WORKERS,
+                 queue_size=ORDER_QUEUE_SIZE, poll_interval=ORDER_POLL_INTERVAL):
+        self.client = client
+        self.limiter = TokenBucket(rate)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        if hasattr(client, "reqsession"):
+            adapter = HTTPAdapter(pool_connections=workers + 1, pool_maxsize=workers + 1)
+            client.reqsession.mount("https://", adapter)
+            client.reqsession.mount("http://", adapter)
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._last_signal = {}
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._threads = []
+        self._stop = threading.Event()
+        self._orders = None
+        self._positions = None
+        self.last_poll = None
+        self._latencies = deque(maxlen=10000)
+        self._first_submit = None
+        self._last_done = None
+        self.counts = {"submitted": 0, "placed": 0, "failed": 0, "duplicates": 0, "queue_full": 0}
+
+    def start(self):
+        if not self._threads:
+            for q in self._queues:
+                self._threads.append(threading.Thread(target=self._work, args=(q,), daemon=True))
+            if self.poll_interval:
+                self._threads.append(threading.Thread(target=self._poll, daemon=True))
+            for t in self._threads:
+                t.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for q in self._queues:
+            try:
+                q.put_nowait(None)
+            except queue.Full:
+                # Drop what is still queued rather than block shutdown behind it
+                self._drain(q)
+                q.put_nowait(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def submit(self, ticker, side, quantity, signal=None, callback=None, **order_args):
+        intent = OrderIntent(ticker, side, quantity, signal=signal, callback=callback, **order_args)
+        # Counted under the lock before a worker can see the intent, so wait_idle never sees it finish first
+        with self._lock:
+            try:
+                self._queues[hash(ticker) % self.workers].put_nowait(intent)
+            except queue.Full:
+                self.counts["queue_full"] += 1
+                intent = None
+            else:
+                self.counts["submitted"] += 1
+                self._first_submit = self._first_submit or intent.created_at
+        if intent is None:
+            print(f"[ERROR] Order queue full, dropping {side.upper()} {quantity} {ticker}")
+        return intent
+
+    def submit_signal(self, ticker, signal, shares, callback=None):
+        # Same one-order-per-signal rule as broker_api.auto_place_order, applied at enqueue time
+        with self._lock:
+            if self._last_signal.get(ticker) == signal:
+                self.counts["duplicates"] += 1
+                return None
+            self._last_signal[ticker] = signal
+        side = "buy" if signal == "BUY" else "sell"
+        intent = self.submit(ticker, side, shares, signal=signal, callback=callback)
+        if intent is None:
+            self._forget_signal(ticker, signal)
+        return intent
+
+    def _forget_signal(self, ticker, signal):
+        with self._lock:
+            if self._last_signal.get(ticker) == signal:
+                del self._last_signal[ticker]
+
+    def _drain(self, q):
+        while True:
+            try:
+                intent = q.get_nowait()
+            except queue.Empty:
+                return
+            if intent is not None:
+                intent.error = RuntimeError("order manager stopped")
+                print(f"[ERROR] Order manager stopped, dropping {intent.side.upper()} {intent.quantity} "
+                      f"{intent.ticker}")
+                self._finish(intent, time.perf_counter())
+
+    def _work(self, q):
+        while True:
+            intent = q.get()
+            if intent is None:
+                return
+            self.limiter.acquire()
+            client = self.client
+            try:
+                with timer("order_place"):
+                    intent.order_id = client.place_order(
+                        tradingsymbol=intent.ticker,
+                        exchange=intent.exchange,
+                        transaction_type=client.TRANSACTION_TYPE_BUY if intent.side.lower() == "buy"
+                        else client.TRANSACTION_TYPE_SELL,
+                        quantity=intent.quantity,
+                        product=intent.product,
+                        order_type=intent.order_type,
+                        variety=client.VARIETY_REGULAR,
+                        validity=client.VALIDITY_DAY
+                    )
+                print(f"[TRADE EXECUTED] {intent.side.upper()} {intent.quantity} shares of {intent.ticker} "
+                      f"| Order ID: {intent.order_id}")
+            except Exception as e:
+                intent.error = e
+                print(f"[ERROR] Order placement failed for {intent.ticker}: {e}")
+            self._finish(intent, time.perf_counter())
+
+    def _finish(self, intent, finished):
+        if intent.error is not None and intent.signal:
+            self._forget_signal(intent.ticker, intent.signal)
+        if intent.callback:
+            try:
+                intent.callback(intent)
+            except Exception as e:
+                print(f"[ERROR] Order callback failed for {intent.ticker}: {e}")
+        # Counted only after the callback, so wait_idle also covers the state it updates
+        with self._lock:
+            self.counts["placed" if intent.error is None else "failed"] += 1
+            self._latencies.append(finished - intent.created_at)
+            self._last_done = finished
+            self._idle.notify_all()
+        count("orders_placed" if intent.error is None else "orders_failed")
+        intent.done.set()
+
+    def refresh(self):
+        try:
+            self._orders = self.client.orders()
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch orders: {e}")
+        try:
+            self._positions = self.client.positions()
+        except Exception as e:
+            print(f"[ERROR] Failed to fetch positions: {e}")
+        self.last_poll = time.time()
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.poll_interval)
+
+    def orders(self):
+        if self.last_poll is None:
+            self.refresh()
+        return self._orders or []
+
+    def positions(self):
+        if self.last_poll is None:
+            self.refresh()
+        return self._positions or {}
+
+    def wait_idle(self, timeout=30):
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: self.counts["placed"] + self.counts["failed"] >= self.counts["submitted"], timeout)
+
+    def stats(self):
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            counts = dict(self.counts)
+            elapsed = (self._last_done - self._first_submit) if self._last_done and self._first_submit else 0
+        result = dict(counts, queued=sum(q.qsize() for q in self._queues))
+        result["orders_per_sec"] = (counts["placed"] + counts["failed"]) / elapsed if elapsed > 0 else 0.0
+        if len(latencies):
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            result["submit_latency_ms"] = {"p50": float(p50), "p99": float(p99)}
+        return result
+
+
+class FakeKiteServer:
+    """Local stand-in for the Kite REST API covering order placement, orders and positions."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.orders = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, data):
+                body = json.dumps({"status": "success", "data": data}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                time.sleep(server.latency)
+                with server._lock:
+                    order_id = str(len(server.orders) + 1)
+                    server.orders.append({"order_id": order_id, "status": "COMPLETE"})
+                self._reply({"order_id": order_id})
+
+            def do_GET(self):
+                time.sleep(server.latency)
+                if self.path.startswith("/portfolio/positions"):
+                    self._reply({"net": [], "day": []})
+                else:
+                    with server._lock:
+                        self._reply(list(server.orders))
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+
+if __name__ == "__main__":
+    from kiteconnect import KiteConnect
+
+    server = FakeKiteServer(latency=0.02).start()
+    for rate, workers in [(ORDER_RATE_LIMIT, ORDER_WORKERS), (200, 8)]:
+        client = KiteConnect("test", access_token="test", root=server.url)
+        manager = OrderManager(client, rate=rate, workers=workers, poll_interval=0).start()
+        start = time.perf_counter()
+        for i in range(100):
+            manager.submit(f"SYM{i}", "buy", 1)
+        enqueue_ms = (time.perf_counter() - start) * 1000
+        manager.wait_idle()
+        manager.stop()
+        stats = manager.stats()
+        print(f"rate={rate}/s workers={workers}: enqueue 100 in {enqueue_ms:.1f} ms, "
+              f"{stats['placed']} placed at {stats['orders_per_sec']:.1f} orders/sec, "
+              f"submit-to-ack {stats['submit_latency_ms']}")
+    server.stop()
@@ -0,0 +1,240 @@
+import time
+import numpy as np
+from live_trading import LiveTrader, STAGES as LIVE_STAGES
+from order_manager import OrderManager
+from risk_management import RiskManager
+from tick_ingestion import replay, synthetic_tick_batches, load_recorded_ticks
+from config import (DEFAULT_CAPITAL, STOP_LOSS, TAKE_PROFIT, PAPER_SLIPPAGE_BPS, PAPER_LATENCY,
+                    PAPER_TICK_INTERVAL)
+
+STAGES = LIVE_STAGES + ["fills"]
+
+
+class SimClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+
+class PaperBroker:
+    """KiteConnect stand-in that fills market orders against replayed prices.
+
+    Orders fill at the first price seen latency simulated seconds after placement,
+    moved against the trader by slippage_bps. Positions are signed (MIS shorts).
+    """
+
+    TRANSACTION_TYPE_BUY = "BUY"
+    TRANSACTION_TYPE_SELL = "SELL"
+    VARIETY_REGULAR = "regular"
+    VALIDITY_DAY = "DAY"
+
+    def __init__(self, clock, slippage_bps=PAPER_SLIPPAGE_BPS, latency=PAPER_LATENCY):
+        self.clock = clock
+        self.slippage = slippage_bps / 10000
+        self.latency = latency
+        self.prices = {}
+        self._orders = []
+        self._pending = []
+        self._net = {}
+        self.realized = 0.0
+        self.slippage_cost = 0.0
+
+    def place_order(self, tradingsymbol, exchange, transaction_type, quantity, product, order_type,
+                    variety, validity=None, **kwargs):
+        order = {"order_id": str(len(self._orders) + 1), "tradingsymbol": tradingsymbol, "exchange": exchange,
+                 "transaction_type": transaction_type, "quantity": quantity, "product": product,
+                 "status": "OPEN", "average_price": 0.0, "order_timestamp": self.clock.now}
+        self._orders.append(order)
+        self._pending.append((self.clock.now + self.latency, order))
+        self.fill_due()
+        return order["order_id"]
+
+    def on_price(self, symbol, price):
+        self.prices[symbol] = price
+
+    def fill_due(self):
+        remaining = []
+        for due, order in self._pending:
+            if due <= self.clock.now and order["tradingsymbol"] in self.prices:
+                self._fill(order)
+            else:
+                remaining.append((due, order))
+        self._pending = remaining
+
+    def _fill(self, order):
+        last = self.prices[order["tradingsymbol"]]
+        direction = 1 if order["transaction_type"] == self.TRANSACTION_TYPE_BUY else -1
+        price = last * (1 + direction * self.slippage)
+        self.slippage_cost += abs(price - last) * order["quantity"]
+        qty, avg = self._net.get(order["tradingsymbol"], (0, 0.0))
+        delta = direction * order["quantity"]
+        if qty == 0 or np.sign(qty) == direction:
+            avg = (avg * abs(qty) + price * abs(delta)) / (abs(qty) + abs(delta))
+        else:
+            closed = min(abs(qty), abs(delta))
+            self.realized += closed * (price - avg) * np.sign(qty)
+            if abs(delta) > abs(qty):
+                avg = price
+        qty += delta
+        self._net[order["tradingsymbol"]] = (qty, avg if qty else 0.0)
+        order.update(status="COMPLETE", average_price=price, fill_timestamp=self.clock.now)
+
+    def orders(self):
+        return list(self._orders)
+
+    def positions(self):
+        net = []
+        for symbol, (qty, avg) in self._net.items():
+            last = self.prices.get(symbol, avg)
+            net.append({"tradingsymbol": symbol, "quantity": qty, "average_price": avg, "last_price": last,
+                        "unrealised": (last - avg) * qty})
+        return {"net": net, "day": []}
+
+    def pnl(self):
+        unrealized = sum(p["unrealised"] for p in self.positions()["net"])
+        return {"realized": self.realized, "unrealized": unrealized, "total": self.realized + unrealized,
+                "slippage_cost": self.slippage_cost}
+
+
+class PaperFeed:
+    """Replays tick batches through KiteTicker-style callbacks (on_connect, on_ticks, on_close)."""
+
+    MODE_FULL = "full"
+
+    def __init__(self, batches, rate=None):
+        self.batches = batches
+        self.rate = rate
+        self.subscribed = set()
+        self.on_connect = None
+        self.on_ticks = None
+        self.on_close = None
+        self.sent = 0
+        self.seconds = 0.0
+
+    def subscribe(self, tokens):
+        self.subscribed.update(tokens)
+
+    def set_mode(self, mode, tokens):
+        pass
+
+    def connect(self, threaded=False):
+        # Synchronous by default so a replay is deterministic
+        if self.on_connect:
+            self.on_connect(self, {})
+        batches = ([t for t in batch if t["instrument_token"] in self.subscribed] for batch in self.batches)
+        self.sent, self.seconds = replay(batches, lambda ws, ticks: self.on_ticks(self, ticks), self.rate)
+        if self.on_close:
+            self.on_close(self, 1000, "replay finished")
+
+
+def start_paper_feed(instrument_tokens, on_ticks, on_connect=None, on_close=None, batches=None, rate=None):
+    """Same callback interface as broker_api.start_live_feed, fed from recorded or synthetic batches."""
+    feed = PaperFeed(batches or [], rate)
+
+    def _on_connect(ws, response):
+        ws.subscribe(instrument_tokens)
+        ws.set_mode(ws.MODE_FULL, instrument_tokens)
+        if on_connect:
+            on_connect(ws, response)
+
+    feed.on_connect = _on_connect
+    feed.on_ticks = on_ticks
+    feed.on_close = on_close
+    feed.connect()
+    return feed
+
+
+class PaperTradingSimulator:
+    """Drives the live tick path (LiveTrader behind an OrderManager) against a PaperBroker.
+
+    Each replayed batch advances a simulated clock by interval seconds, so cooldowns,
+    fill latency and stop checks behave as they would live while the replay itself
+    runs as fast as the code allows. The order queue is drained after every batch
+    with a single worker, which keeps replays deterministic.
+    """
+
+    def __init__(self, model, token_to_ticker, capital=DEFAULT_CAPITAL, slippage_bps=PAPER_SLIPPAGE_BPS,
+                 latency=PAPER_LATENCY, interval=PAPER_TICK_INTERVAL, stop_loss_pct=STOP_LOSS,
+                 take_profit_pct=TAKE_PROFIT, cooldown=0):
+        self.token_to_ticker = token_to_ticker
+        self.interval = interval
+        self.clock = SimClock()
+        self.broker = PaperBroker(self.clock, slippage_bps, latency)
+        risk_manager = RiskManager(capital, stop_loss_pct=stop_loss_pct, take_profit_pct=take_profit_pct,
+                                   cooldown=cooldown)
+        # Effectively unthrottled: the replay runs far faster than real time
+        self.order_manager = OrderManager(self.broker, rate=1e9, workers=1, poll_interval=0)
+        self.stage_seconds = {stage: [] for stage in STAGES}
+        self.trader = LiveTrader(model, token_to_ticker, risk_manager, self.order_manager, window_ms=0,
+                                 clock=self.clock.time, stage_seconds=self.stage_seconds)
+        self.ticks = 0
+
+    def on_ticks(self, ws, ticks):
+        self.clock.now += self.interval
+        for tick in ticks:
+            ticker = self.token_to_ticker.get(tick["instrument_token"])
+            if ticker is not None:
+                self.broker.on_price(ticker, tick["last_price"])
+        self.ticks += len(ticks)
+        self.trader.on_ticks(ticks)
+        start = time.perf_counter()
+        self.order_manager.wait_idle()
+        self.broker.fill_due()
+        self.order_manager.refresh()
+        self.trader.sync_positions()
+        self.stage_seconds["fills"].append(time.perf_counter() - start)
+
+    def run(self, batches, rate=None):
+        self.order_manager.start()
+        wall_start = time.perf_counter()
+        try:
+            feed = start_paper_feed(list(self.token_to_ticker), self.on_ticks, batches=batches, rate=rate)
+        finally:
+            self.order_manager.stop()
+        return self.report(time.perf_counter() - wall_start, len(feed.batches))
+
+    def report(self, wall_seconds, n_batches):
+        stage_ms = {}
+        for stage, values in self.stage_seconds.items():
+            if values:
+                p50, p99 = np.percentile(values, [50, 99]) * 1000
+                stage_ms[stage] = {"p50": float(p50), "p99": float(p99)}
+        simulated = n_batches * self.interval
+        orders = self.broker.orders()
+        return {
+            "ticks": self.ticks,
+            "wall_seconds": wall_seconds,
+            "ticks_per_sec": self.ticks / wall_seconds if wall_seconds > 0 else 0.0,
+            "speedup": simulated / wall_seconds if wall_seconds > 0 else 0.0,
+            "stage_ms": stage_ms,
+            "tick_to_signal_ms": self.trader.scheduler.latency_percentiles(),
+            "orders": len(orders),
+            "filled": sum(o["status"] == "COMPLETE" for o in orders),
+            "pnl": self.broker.pnl(),
+        }
+
+
+if __name__ == "__main__":
+    import sys
+    from sklearn.ensemble import RandomForestClassifier
+    from inference_scheduler import FEATURES
+
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=200, random_state=42).fit(
+        rng.normal(size=(1000, len(FEATURES))), rng.integers(0, 2, 1000))
+    tokens = list(range(100))
+    batches = load_recorded_ticks(sys.argv[1]) if len(sys.argv) > 1 else synthetic_tick_batches(tokens, 1000)
+    token_to_ticker = {tok: f"SYM{tok:03d}" for tok in {t["instrument_token"] for b in batches for t in b}}
+
+    reports = [PaperTradingSimulator(model, token_to_ticker).run(batches) for _ in range(2)]
+    report = reports[0]
+    stages = ", ".join(f"{k} p50 {v['p50']:.2f} / p99 {v['p99']:.2f} ms" for k, v in report["stage_ms"].items())
+    pnl = report["pnl"]
+    print(f"{report['ticks']} ticks in {report['wall_seconds']:.2f}s: {report['ticks_per_sec']:,.0f} ticks/sec, "
+          f"{report['speedup']:.0f}x real time")
+    print(f"Per batch: {stages}")
+    print(f"Orders {report['orders']} (filled {report['filled']}); P&L realized {pnl['realized']:,.2f}, "
+          f"unrealized {pnl['unrealized']:,.2f}, total {pnl['total']:,.2f}, slippage {pnl['slippage_cost']:,.2f}")
+    print(f"Deterministic across runs: {reports[0]['pnl'] == reports[1]['pnl']}")
@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import pandas as pd
+import data_fetcher
+from data_cache import OHLCVCache
+from data_fetcher import get_stock_data, get_ohlcv_cache
+from feature_engineering import add_technical_indicators, create_labels
+from models import train_random_forest, train_xgboost
+from backtest import backtest_strategy_vectorized
+from config import STOP_LOSS, TAKE_PROFIT, PIPELINE_WORKERS, PIPELINE_TASKS_PER_WORKER
+
+STAGES = ["fetch", "indicators", "labels", "train", "backtest"]
+TRAINERS = {"RandomForest": train_random_forest, "XGBoost": train_xgboost}
+
+_worker = {}
+
+def _init_worker(model, model_type, period, cache_dir, source):
+    data_fetcher.ohlcv_cache = OHLCVCache(cache_dir, source)
+    _worker.update(model=model, model_type=model_type, period=period)
+
+def _run_ticker(ticker):
+    timings = dict.fromkeys(STAGES, 0.0)
+    try:
+        start = time.perf_counter()
+        df = get_stock_data(ticker, _worker["period"])
+        timings["fetch"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = add_technical_indicators(df)
+        timings["indicators"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df = create_labels(df)
+        timings["labels"] = time.perf_counter() - start
+        if df.empty:
+            raise ValueError("not enough history for indicators")
+
+        model = _worker["model"]
+        if model is None:
+            start = time.perf_counter()
+            model, _ = TRAINERS[_worker["model_type"]](df)
+            timings["train"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = backtest_strategy_vectorized(df, model, stop_loss=STOP_LOSS, take_profit=TAKE_PROFIT)
+        timings["backtest"] = time.perf_counter() - start
+    except Exception as e:
+        return ticker, None, timings, str(e)
+
+    row = {
+        "Ticker": ticker,
+        "Last_Close": float(df["Close"].iloc[-1]),
+        "Predicted_Return %": metrics.get("Total Return %", 0),
+    }
+    return ticker, row, timings, None
+
+def run_pipeline(tickers, model=None, model_type="RandomForest", period="2y",
+                 workers=PIPELINE_WORKERS, tasks_per_worker=PIPELINE_TASKS_PER_WORKER, cache=None):
+    """Fetch, featurize, (optionally) train and backtest every ticker across a process pool.
+
+    With model=None each ticker gets its own model of model_type; otherwise the
+    given model is shipped once to each worker. Returns (results_df, report)
+    where results_df is what portfolio.allocate_portfolio expects. Workers are
+    recycled every tasks_per_worker tickers on Python 3.11+ (max_tasks_per_child)
+    and live for the whole run on older versions.
+    """
+    cache = cache or get_ohlcv_cache()
+    workers = workers or os.cpu_count() or 1
+    report = {"workers": workers, "stage_seconds": dict.fromkeys(STAGES, 0.0), "errors": {}}
+    wall_start = time.perf_counter()
+
+    # One batched download in the parent so workers only read the warm cache
+    start = time.perf_counter()
+    cache.get_many(tickers, period)
+    report["prefetch_seconds"] = time.perf_counter() - start
+
+    rows = {}
+
+    def collect(result):
+        ticker, row, timings, error = result
+        for stage, seconds in timings.items():
+            report["stage_seconds"][stage] += seconds
+        if error:
+            report["errors"][ticker] = error
+        else:
+            rows[ticker] = row
+
+    if workers == 1:
+        # In-process: run against the given cache and put the module globals back afterwards,
+        # so the caller's get_ohlcv_cache() keeps its state and stats
+        saved_cache, saved_worker = data_fetcher.ohlcv_cache, dict(_worker)
+        data_fetcher.ohlcv_cache = cache
+        _worker.update(model=model, model_type=model_type, period=period)
+        try:
+            for ticker in tickers:
+                collect(_run_ticker(ticker))
+        finally:
+            data_fetcher.ohlcv_cache = saved_cache
+            _worker.clear()
+            _worker.update(saved_worker)
+    else:
+        # Bound in-flight tasks and recycle workers so memory stays flat on large universes;
+        # max_tasks_per_child needs Python 3.11+
+        recycle = {"max_tasks_per_child": tasks_per_worker} if sys.version_info >= (3, 11) else {}
+        init_args = (model, model_type, period, cache.cache_dir, cache.source)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args,
+                                 **recycle) as pool:
+            pending = set()
+            for ticker in tickers:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(pool.submit(_run_ticker, ticker))
+            for future in wait(pending)[0]:
+                collect(future.result())
+
+    report["wall_seconds"] = time.perf_counter() - wall_start
+    results_df = pd.DataFrame([rows[t] for t in tickers if t in rows],
+                              columns=["Ticker", "Last_Close", "Predicted_Return %"])
+    return results_df, report
+
+if __name__ == "__main__":
+    import tempfile
+    import numpy as np
+    from datetime import date
+    from data_cache import LocalCSVSource
+
+    n_tickers = 100
+    fixture_dir = tempfile.mkdtemp(prefix="pipeline_fixtures_")
+    rng = np.random.default_rng(0)
+    index = pd.Index(pd.bdate_range(end=date.today(), periods=520), name="Date")
+    tickers = [f"SYM{i:03d}" for i in range(n_tickers)]
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(index))))
+        spread = np.abs(rng.normal(0, 1.0, len(index)))
+        pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close,
+                      "Volume": 1e6}, index=index).to_csv(os.path.join(fixture_dir, f"{ticker}.csv"))
+    cache = OHLCVCache(os.path.join(fixture_dir, "cache"), LocalCSVSource(fixture_dir))
+
+    baseline = None
+    worker_counts = sorted({1, 2, os.cpu_count() or 1})
+    for n in worker_counts:
+        _, report = run_pipeline(tickers, workers=n, cache=cache)
+        baseline = baseline or report["wall_seconds"]
+        stages = ", ".join(f"{k} {v:.1f}s" for k, v in report["stage_seconds"].items())
+        print(f"workers={n}: {report['wall_seconds']:.1f}s wall, speedup {baseline / report['wall_seconds']:.2f}x "
+              f"[{stages}]")
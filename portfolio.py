@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def rank_stocks(results_df):
@@ -8,5 +9,5 @@ def allocate_portfolio(results_df, capital=10000):
     ranked = rank_stocks(results_df)
     allocation = capital / len(ranked) if len(ranked) > 0 else 0
     ranked["Allocation_$"] = allocation
-    ranked["Shares"] = (ranked["Allocation_$"] / ranked["Last_Close"]).apply(lambda x: max(1, int(x)))
+    ranked["Shares"] = np.maximum(1, np.trunc(ranked["Allocation_$"] / ranked["Last_Close"])).astype(int)
     return ranked
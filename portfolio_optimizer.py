@@ -0,0 +1,183 @@
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+from portfolio import rank_stocks
+from config import COV_WINDOW, COV_SHRINKAGE
+
+
+class RollingCovariance:
+    """Rolling-window covariance of daily returns updated one row at a time.
+
+    Keeps running sums of x and x x^T, so appending a day costs O(N^2) instead of
+    recomputing the whole window. update_from_prices only consumes dates newer
+    than the last one seen, so the object can be kept between refreshes.
+    """
+
+    def __init__(self, tickers, window=COV_WINDOW, shrinkage=COV_SHRINKAGE):
+        self.tickers = list(tickers)
+        self.window = window
+        self.shrinkage = shrinkage
+        n = len(self.tickers)
+        self.rows = deque()
+        self.sum_x = np.zeros(n)
+        self.sum_xx = np.zeros((n, n))
+        self.last_date = None
+        self.last_prices = None
+
+    def update(self, returns):
+        returns = np.nan_to_num(np.asarray(returns, dtype=float))
+        self.rows.append(returns)
+        self.sum_x += returns
+        self.sum_xx += np.outer(returns, returns)
+        if len(self.rows) > self.window:
+            old = self.rows.popleft()
+            self.sum_x -= old
+            self.sum_xx -= np.outer(old, old)
+
+    def update_from_prices(self, prices):
+        # prices: DataFrame of closes (dates x tickers)
+        prices = prices[self.tickers]
+        if self.last_date is not None:
+            prices = prices[prices.index > self.last_date]
+        values = prices.to_numpy(dtype=float)
+        previous = self.last_prices
+        for row in values:
+            if previous is not None:
+                self.update(row / previous - 1)
+            previous = np.where(np.isnan(row), previous, row) if previous is not None else row
+        if len(prices):
+            self.last_date = prices.index[-1]
+            self.last_prices = previous
+        return self
+
+    def covariance(self):
+        n = len(self.rows)
+        if n < 2:
+            raise ValueError("Need at least two return observations for a covariance")
+        mean = self.sum_x / n
+        cov = (self.sum_xx - n * np.outer(mean, mean)) / (n - 1)
+        # Shrink toward a diagonal target to keep the matrix well conditioned for large universes
+        target = np.diag(np.diag(cov))
+        return (1 - self.shrinkage) * cov + self.shrinkage * target
+
+    def covariance_frame(self):
+        return pd.DataFrame(self.covariance(), index=self.tickers, columns=self.tickers)
+
+
+def equal_weights(n):
+    return np.full(n, 1.0 / n) if n else np.zeros(0)
+
+def risk_parity_weights(cov, iterations=500, tol=1e-10):
+    # Equal risk contribution by multiplicative fixed-point updates, starting from inverse volatility
+    vol = np.sqrt(np.clip(np.diag(cov), 1e-18, None))
+    w = (1 / vol) / np.sum(1 / vol)
+    for _ in range(iterations):
+        contrib = w * (cov @ w)
+        target = contrib.mean()
+        new = w * np.sqrt(target / np.clip(contrib, 1e-18, None))
+        new /= new.sum()
+        if np.max(np.abs(new - w)) < tol:
+            return new
+        w = new
+    return w
+
+def mean_variance_weights(cov, expected_returns, risk_aversion=1.0):
+    # Unconstrained optimum Sigma^-1 mu / lambda, then long-only and fully invested
+    raw = np.linalg.solve(cov + 1e-12 * np.eye(len(cov)), expected_returns) / risk_aversion
+    raw = np.clip(raw, 0, None)
+    if raw.sum() <= 0:
+        return np.zeros(len(raw))
+    return raw / raw.sum()
+
+def capped_weights(weights, cap):
+    # Clip at cap and hand the excess to uncapped names pro rata until nothing exceeds it
+    w = np.asarray(weights, dtype=float).copy()
+    if cap is None or len(w) == 0:
+        return w
+    for _ in range(len(w)):
+        over = w > cap + 1e-12
+        if not over.any():
+            break
+        excess = (w[over] - cap).sum()
+        w[over] = cap
+        free = w < cap - 1e-12
+        if not free.any() or w[free].sum() <= 0:
+            break
+        w[free] += excess * w[free] / w[free].sum()
+    # If the cap makes full investment impossible, the remainder stays in cash
+    return np.minimum(w, cap)
+
+def round_to_shares(weights, prices, capital, cap=None):
+    # Floor to whole shares, then spend leftover cash one share at a time on the most underweight names
+    target = weights * capital
+    shares = np.floor(target / prices)
+    cash = capital - (shares * prices).sum()
+    limit = cap * capital if cap is not None else np.inf
+    for _ in range(2 * len(prices)):
+        spent = shares * prices
+        deficit = np.where((prices <= cash) & (spent + prices <= limit + 1e-9) & (weights > 0),
+                           target - spent, -np.inf)
+        i = int(np.argmax(deficit))
+        if not np.isfinite(deficit[i]) or deficit[i] <= 0:
+            break
+        shares[i] += 1
+        cash -= prices[i]
+    return shares.astype(int)
+
+def optimize_portfolio(results_df, capital=10000, cov=None, method="risk_parity", max_weight=None,
+                       risk_manager=None, risk_aversion=1.0):
+    """Allocate capital across ranked tickers.
+
+    method is "equal", "risk_parity" or "mean_variance"; the latter two need cov
+    (DataFrame indexed by ticker). Weights are capped at max_weight or, if given,
+    risk_manager.max_alloc_fraction, and converted to whole shares.
+    """
+    ranked = rank_stocks(results_df).reset_index(drop=True)
+    n = len(ranked)
+    if n == 0:
+        return ranked.assign(Weight=[], **{"Allocation_$": [], "Shares": []})
+    cap = risk_manager.max_alloc_fraction if risk_manager is not None else max_weight
+    tickers = ranked["Ticker"].tolist()
+    if method == "equal" or cov is None:
+        w = equal_weights(n)
+    else:
+        sigma = cov.loc[tickers, tickers].to_numpy(dtype=float)
+        if method == "risk_parity":
+            w = risk_parity_weights(sigma)
+        elif method == "mean_variance":
+            w = mean_variance_weights(sigma, ranked["Predicted_Return %"].to_numpy(dtype=float) / 100,
+                                      risk_aversion)
+        else:
+            raise ValueError(f"Unknown allocation method: {method}")
+    w = capped_weights(w, cap)
+    prices = ranked["Last_Close"].to_numpy(dtype=float)
+    shares = round_to_shares(w, prices, capital, cap)
+    ranked["Weight"] = w
+    ranked["Shares"] = shares
+    ranked["Allocation_$"] = shares * prices
+    return ranked
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n_names, n_days = 500, 300
+    tickers = [f"SYM{i:03d}" for i in range(n_names)]
+    factor = rng.normal(0, 0.01, (n_days, 1))
+    rets = 0.6 * factor + rng.normal(0, 0.015, (n_days, n_names))
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rets, axis=0)), index=pd.bdate_range("2024-01-01", periods=n_days),
+                          columns=tickers)
+    results = pd.DataFrame({"Ticker": tickers, "Last_Close": prices.iloc[-1].values,
+                            "Predicted_Return %": rng.normal(0.05, 0.2, n_names)})
+
+    start = time.perf_counter()
+    cov_state = RollingCovariance(tickers).update_from_prices(prices.iloc[:-1])
+    print(f"Initial covariance build ({n_days - 1} days x {n_names}): {time.perf_counter() - start:.3f}s")
+    start = time.perf_counter()
+    cov = cov_state.update_from_prices(prices).covariance_frame()
+    print(f"Incremental refresh (+1 day): {(time.perf_counter() - start) * 1000:.1f} ms")
+    for method in ("equal", "risk_parity", "mean_variance"):
+        start = time.perf_counter()
+        alloc = optimize_portfolio(results, 1_000_000, cov=cov, method=method, max_weight=0.02)
+        elapsed = time.perf_counter() - start
+        print(f"{method:>14}: {elapsed * 1000:6.1f} ms, invested {alloc['Allocation_$'].sum():,.0f}, "
+              f"max weight {alloc['Weight'].max():.4f}, names held {(alloc['Shares'] > 0).sum()}")
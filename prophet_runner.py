@@ -0,0 +1,82 @@
+import os
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from model_registry import ModelRegistry, model_key
+from config import MODEL_REGISTRY_DIR, PIPELINE_WORKERS
+
+def _quiet():
+    # Prophet configures these loggers on import, so import it before adjusting them
+    import prophet  # noqa: F401
+
+    for name in ("cmdstanpy", "prophet"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+def fit_or_load(ticker, close, registry, periods=5):
+    """Return the Prophet trend for one ticker, fitting only when the data changed.
+
+    cached: a model for this data end-date is already in the registry.
+    warm:   an older model exists; refit with its parameters as the starting point.
+    cold:   no previous model.
+    """
+    from models_prophet import train_prophet, warm_start_params, predict_prophet_trend
+
+    _quiet()
+    df = close.to_frame("Close")
+    data_end = str(df.index[-1])[:10]
+    key = model_key("Prophet", ticker, data_end)
+    start = time.perf_counter()
+    if registry.exists(key):
+        model, _ = registry.load(key)
+        mode = "cached"
+    else:
+        previous = registry.latest("Prophet", ticker, before=data_end)
+        init = warm_start_params(registry.load(previous)[0]) if previous else None
+        model = train_prophet(df, init=init)
+        registry.save("Prophet", ticker, model, data_end)
+        mode = "warm" if init else "cold"
+    fit_seconds = time.perf_counter() - start
+    return {"Ticker": ticker, "Prophet_Trend": predict_prophet_trend(model, periods), "Mode": mode,
+            "Fit_Seconds": fit_seconds}
+
+def _run_one(args):
+    ticker, close, periods, root = args
+    try:
+        return fit_or_load(ticker, close, ModelRegistry(root, max_in_memory=1), periods)
+    except Exception as e:
+        return {"Ticker": ticker, "Prophet_Trend": float("nan"), "Mode": f"error: {e}", "Fit_Seconds": 0.0}
+
+def run_prophet(frames, periods=5, workers=PIPELINE_WORKERS, registry_root=MODEL_REGISTRY_DIR):
+    """Fit/refresh a Prophet model per ticker across a process pool; returns one row per ticker."""
+    workers = workers or os.cpu_count() or 1
+    # Only the Close series crosses the process boundary
+    tasks = [(t, df["Close"].squeeze().astype(float), periods, registry_root)
+             for t, df in frames.items() if df is not None and not df.empty]
+    if workers == 1:
+        rows = [_run_one(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_run_one, tasks))
+    return pd.DataFrame(rows, columns=["Ticker", "Prophet_Trend", "Mode", "Fit_Seconds"])
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import numpy as np
+
+    _quiet()
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range("2023-01-02", periods=505)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (len(dates), n_tickers)), axis=0))
+    full = {f"SYM{i:03d}": pd.DataFrame({"Close": closes[:, i]}, index=dates) for i in range(n_tickers)}
+    older = {t: df.iloc[:-5] for t, df in full.items()}
+    root = tempfile.mkdtemp(prefix="prophet_registry_")
+
+    for label, frames in [("cold", older), ("warm (+5 days)", full), ("cached", full)]:
+        start = time.perf_counter()
+        result = run_prophet(frames, registry_root=root)
+        elapsed = time.perf_counter() - start
+        modes = result["Mode"].value_counts().to_dict()
+        print(f"{label:>15}: {n_tickers} tickers in {elapsed:.1f}s ({elapsed / n_tickers * 1000:.0f} ms/ticker) {modes}")
@@ -1,4 +1,7 @@
 import time
+import threading
+import numpy as np
+from config import ORDER_POLL_INTERVAL
 
 class RiskManager:
     def __init__(self, capital, max_alloc_fraction=0.2, stop_loss_pct=0.05, take_profit_pct=0.1, cooldown=3600):
@@ -9,12 +12,12 @@ class RiskManager:
         self.cooldown = cooldown
         self.last_trade_time = {}
 
-    def can_trade(self, ticker):
-        last_time = self.last_trade_time.get(ticker, 0)
-        return (time.time() - last_time) > self.cooldown
+    def can_trade(self, ticker, now=None):
+        last_time = self.last_trade_time.get(ticker, -np.inf)
+        return ((time.time() if now is None else now) - last_time) > self.cooldown
 
-    def update_trade_time(self, ticker):
-        self.last_trade_time[ticker] = time.time()
+    def update_trade_time(self, ticker, now=None):
+        self.last_trade_time[ticker] = time.time() if now is None else now
 
     def get_max_allocation(self):
         return self.capital * self.max_alloc_fraction
@@ -24,3 +27,187 @@ class RiskManager:
 
     def check_take_profit(self, entry_price, current_price):
         return (current_price - entry_price) / entry_price >= self.take_profit_pct
+
+
+class PositionBook:
+    """Open positions held in NumPy arrays so every risk rule is one vectorized pass per tick batch.
+
+    on_prices returns exit intents for positions that hit their stop-loss, take-profit
+    or push gross exposure over max_exposure. Stop-losses always fire; take-profit
+    and exposure trims respect the per-instrument cooldown. on_prices runs on the
+    tick ingestion thread and sync on the UI thread, so all access takes a lock.
+    """
+
+    def __init__(self, stop_loss_pct=0.05, take_profit_pct=0.1, cooldown=3600, max_exposure=None, capacity=1024,
+                 sync_grace=2 * ORDER_POLL_INTERVAL):
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pct = take_profit_pct
+        self.cooldown = cooldown
+        self.max_exposure = max_exposure
+        # Seconds an exited position is kept closed even if polled broker positions still show it
+        self.sync_grace = sync_grace
+        self.index = {}
+        self.symbols = []
+        self._lock = threading.RLock()
+        self._allocate(capacity)
+
+    @classmethod
+    def from_risk_manager(cls, risk_manager):
+        # Gross exposure is capped at the account capital
+        return cls(risk_manager.stop_loss_pct, risk_manager.take_profit_pct, risk_manager.cooldown,
+                   max_exposure=risk_manager.capital)
+
+    def _allocate(self, capacity):
+        old = getattr(self, "entry", None)
+        n = 0 if old is None else len(old)
+        arrays = {
+            "entry": np.zeros(capacity), "qty": np.zeros(capacity), "stop": np.zeros(capacity),
+            "target": np.zeros(capacity), "last_price": np.zeros(capacity), "last_trade": np.full(capacity, -np.inf),
+            "active": np.zeros(capacity, dtype=bool), "pending": np.zeros(capacity, dtype=bool),
+            "exited_at": np.full(capacity, np.nan),
+        }
+        for name, arr in arrays.items():
+            if n:
+                arr[:n] = getattr(self, name)
+            setattr(self, name, arr)
+
+    def _slot(self, symbol):
+        i = self.index.get(symbol)
+        if i is None:
+            i = len(self.symbols)
+            if i == len(self.entry):
+                self._allocate(2 * len(self.entry))
+            self.index[symbol] = i
+            self.symbols.append(symbol)
+        return i
+
+    def indices(self, symbols):
+        with self._lock:
+            return np.array([self._slot(s) for s in symbols], dtype=np.intp)
+
+    def _set(self, i, qty, price):
+        direction = 1 if qty > 0 else -1
+        self.entry[i] = price
+        self.qty[i] = qty
+        self.stop[i] = price * (1 - direction * self.stop_loss_pct)
+        self.target[i] = price * (1 + direction * self.take_profit_pct)
+        self.last_price[i] = price
+        self.active[i] = qty != 0
+        self.pending[i] = False
+        self.exited_at[i] = np.nan
+
+    def open(self, symbol, qty, price, now=None):
+        # qty > 0 for long, < 0 for short
+        with self._lock:
+            i = self._slot(symbol)
+            self._set(i, qty, price)
+            self.last_trade[i] = time.time() if now is None else now
+
+    def close(self, symbol, now=None):
+        # Exit filled; sync will not reopen it from stale broker positions for sync_grace seconds
+        now = time.time() if now is None else now
+        with self._lock:
+            i = self.index.get(symbol)
+            if i is not None:
+                self.active[i] = False
+                self.pending[i] = False
+                self.qty[i] = 0
+                self.last_trade[i] = now
+                self.exited_at[i] = now
+
+    def release(self, symbol):
+        # Exit order failed; let the next tick batch re-evaluate the position
+        with self._lock:
+            i = self.index.get(symbol)
+            if i is not None:
+                self.pending[i] = False
+
+    def record_trade(self, symbol, now=None):
+        with self._lock:
+            self.last_trade[self._slot(symbol)] = time.time() if now is None else now
+
+    def sync(self, net_positions, now=None):
+        """Reconcile with broker net positions (tradingsymbol, quantity, average_price).
+
+        An empty list deactivates everything. Positions with an exit in flight, or
+        closed less than sync_grace seconds ago, are left alone. Trade times are not
+        touched, so a sync never restarts cooldowns.
+        """
+        now = time.time() if now is None else now
+        reported = {p["tradingsymbol"]: p for p in net_positions if p.get("quantity")}
+        with self._lock:
+            for symbol, p in reported.items():
+                i = self.index.get(symbol)
+                if i is not None and (self.pending[i] or now - self.exited_at[i] < self.sync_grace):
+                    continue
+                if i is None or not self.active[i] or self.qty[i] != p["quantity"]:
+                    self._set(self._slot(symbol), p["quantity"], p["average_price"])
+            for symbol, i in self.index.items():
+                if symbol not in reported:
+                    # Closed outside the app, or the exit has shown up at the broker
+                    self.active[i] = False
+                    self.pending[i] = False
+                    self.qty[i] = 0
+                    self.exited_at[i] = np.nan
+
+    def exposure(self):
+        with self._lock:
+            return float(np.abs(self.qty * self.last_price)[self.active].sum())
+
+    def on_prices(self, idx, prices, now=None):
+        with self._lock:
+            return self._evaluate(idx, prices, time.time() if now is None else now)
+
+    def _evaluate(self, idx, prices, now):
+        self.last_price[idx] = prices
+        n = len(self.symbols)
+        price, qty, active = self.last_price[:n], self.qty[:n], self.active[:n] & ~self.pending[:n]
+        long = qty > 0
+        hit_stop = active & np.where(long, price <= self.stop[:n], price >= self.stop[:n])
+        hit_target = active & np.where(long, price >= self.target[:n], price <= self.target[:n])
+        cooled = (now - self.last_trade[:n]) > self.cooldown
+        exit_reason = np.full(n, "", dtype=object)
+        exit_reason[hit_target & cooled] = "take_profit"
+        exit_reason[hit_stop] = "stop_loss"
+
+        if self.max_exposure is not None:
+            # Exposure left after the stop/target exits above have been filled
+            value = np.abs(qty * price) * (active & (exit_reason == ""))
+            gross = value.sum()
+            if gross > self.max_exposure:
+                # Trim the largest eligible positions until gross exposure is back under the limit
+                eligible = value * cooled
+                order = np.argsort(-eligible)
+                freed = np.cumsum(eligible[order])
+                need = np.searchsorted(freed, gross - self.max_exposure) + 1
+                trim = order[:need]
+                trim = trim[eligible[trim] > 0]
+                exit_reason[trim] = "exposure"
+
+        exits = np.flatnonzero(exit_reason != "")
+        self.pending[exits] = True
+        return [{"symbol": self.symbols[i], "side": "sell" if qty[i] > 0 else "buy",
+                 "quantity": int(abs(qty[i])), "price": float(price[i]), "reason": exit_reason[i]}
+                for i in exits]
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n_positions, ticks_per_sec, batch_size, seconds = 10_000, 1_000, 100, 10
+    book = PositionBook(max_exposure=5e7, cooldown=0)
+    symbols = [f"SYM{i:05d}" for i in range(n_positions)]
+    entries = rng.uniform(50, 500, n_positions)
+    for s, q, p in zip(symbols, rng.integers(-100, 100, n_positions) | 1, entries):
+        book.open(s, int(q), float(p), now=0)
+    idx_all = book.indices(symbols)
+
+    n_batches = ticks_per_sec * seconds // batch_size
+    batches = [(rng.integers(0, n_positions, batch_size), rng.normal(0, 0.02, batch_size)) for _ in range(n_batches)]
+    exits = 0
+    start = time.perf_counter()
+    for k, (pick, move) in enumerate(batches):
+        exits += len(book.on_prices(idx_all[pick], entries[pick] * (1 + move), now=k))
+    elapsed = time.perf_counter() - start
+    print(f"{n_positions} positions, {n_batches * batch_size} ticks in batches of {batch_size}: "
+          f"{elapsed / n_batches * 1e6:.0f} us/batch, capacity {n_batches * batch_size / elapsed:,.0f} ticks/sec "
+          f"({elapsed / seconds * 100:.1f}% of one core at {ticks_per_sec} ticks/sec), {exits} exit intents")
@@ -0,0 +1,189 @@
+import time
+import numpy as np
+import pandas as pd
+from portfolio import rank_stocks
+from config import SCAN_MAX_STALE_DAYS
+
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+
+
+class Panel:
+    """Dates x tickers arrays of High/Low/Close aligned on a shared date index.
+
+    Dates a ticker did not trade on stay NaN; nothing is filled. own_bars() drops
+    them per ticker so indicators only ever see real bars.
+    """
+
+    def __init__(self, dates, tickers, high, low, close):
+        self.dates = dates
+        self.tickers = list(tickers)
+        self.high = high
+        self.low = low
+        self.close = close
+
+    def own_bars(self):
+        # Each ticker's real bars pushed to the bottom in date order: row -1 is its last bar
+        order = np.argsort(~np.isnan(self.close), axis=0, kind="stable")
+        return tuple(np.take_along_axis(x, order, axis=0) for x in (self.high, self.low, self.close))
+
+    def last_dates(self):
+        valid = ~np.isnan(self.close)
+        last = len(self.dates) - 1 - np.argmax(valid[::-1], axis=0)
+        return pd.DatetimeIndex(self.dates)[last].where(valid.any(axis=0))
+
+    def stale(self, max_age_days=SCAN_MAX_STALE_DAYS):
+        # Measured against the newest bar in the panel, so one market's holiday does not drop it
+        last = self.last_dates()
+        return np.asarray(last.isna() | (last < last.max() - pd.Timedelta(days=max_age_days)))
+
+    @classmethod
+    def from_frames(cls, frames):
+        frames = {t: df for t, df in frames.items() if df is not None and not df.empty}
+        tickers = list(frames)
+        if not tickers:
+            raise ValueError("No price data to build a panel from")
+        columns = {}
+        for col in ("High", "Low", "Close"):
+            wide = pd.concat([frames[t][col].rename(t) for t in tickers], axis=1).sort_index()
+            columns[col] = wide.to_numpy(dtype=float)
+        return cls(wide.index, tickers, columns["High"], columns["Low"], columns["Close"])
+
+
+def _ewm(x, alpha, min_periods):
+    # pandas ewm(alpha=..., adjust=False) per column, starting at each column's first valid value
+    out = np.full_like(x, np.nan)
+    state = np.full(x.shape[1], np.nan)
+    count = np.zeros(x.shape[1])
+    for t in range(x.shape[0]):
+        row = x[t]
+        valid = ~np.isnan(row)
+        state = np.where(np.isnan(state), row, (1 - alpha) * state + alpha * row)
+        count += valid
+        out[t] = np.where(count >= min_periods, state, np.nan)
+    return out
+
+def _rolling_mean(x, window):
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    total = csum.copy()
+    total[window:] -= csum[:-window]
+    count = ccount.copy()
+    count[window:] -= ccount[:-window]
+    return np.where(count == window, total / window, np.nan)
+
+def _atr(high, low, close, window=14):
+    prev_close = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    out = np.full_like(close, np.nan)
+    atr = np.zeros(close.shape[1])
+    seed = np.zeros(close.shape[1])
+    count = np.zeros(close.shape[1])
+    for t in range(close.shape[0]):
+        tr = true_range[t]
+        valid = ~np.isnan(tr)
+        count += valid
+        seed = np.where(valid & (count <= window), seed + np.nan_to_num(tr), seed)
+        atr = np.where(valid & (count == window), seed / window, atr)
+        atr = np.where(valid & (count > window), (atr * (window - 1) + np.nan_to_num(tr)) / float(window), atr)
+        out[t] = np.where(valid, atr, np.nan)
+    return out
+
+def panel_indicators(panel):
+    """Column-wise equivalent of feature_engineering.add_technical_indicators for every ticker at once.
+
+    Computed on each ticker's own bars (Panel.own_bars), so row -1 holds every ticker's latest values.
+    """
+    high, low, close = panel.own_bars()
+    diff = np.vstack([np.zeros((1, close.shape[1])), np.diff(close, axis=0)])
+    first_valid = np.isnan(np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]]))
+    diff = np.where(first_valid & ~np.isnan(close), 0.0, diff)
+    up = np.where(diff > 0, diff, np.where(np.isnan(diff), np.nan, 0.0))
+    down = np.where(diff < 0, -diff, np.where(np.isnan(diff), np.nan, 0.0))
+    avg_up = _ewm(up, 1 / 14, 14)
+    avg_down = _ewm(down, 1 / 14, 14)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = np.where(avg_down == 0, 100, 100 - (100 / (1 + avg_up / avg_down)))
+    return {
+        "RSI": rsi,
+        "MACD": _ewm(close, 2 / 13, 12) - _ewm(close, 2 / 27, 26),
+        "SMA_50": _rolling_mean(close, 50),
+        "SMA_200": _rolling_mean(close, 200),
+        "EMA_20": _ewm(close, 2 / 21, 20),
+        "EMA_50": _ewm(close, 2 / 51, 50),
+        "ATR": _atr(high, low, close),
+    }
+
+def expected_moves(close, lookback=60):
+    # Mean up-day and down-day return per ticker over the lookback window
+    rets = np.diff(close[-(lookback + 1):], axis=0) / close[-(lookback + 1):-1]
+    with np.errstate(invalid="ignore"):
+        up = np.nanmean(np.where(rets > 0, rets, np.nan), axis=0)
+        down = np.nanmean(np.where(rets < 0, rets, np.nan), axis=0)
+    return np.nan_to_num(up), np.nan_to_num(down)
+
+def scan(panel, model, lookback=60, max_age_days=SCAN_MAX_STALE_DAYS):
+    """Score every ticker's latest feature row with one model call and rank them.
+
+    Predicted_Return % is the model's up-probability weighted by the ticker's
+    recent average up/down day, so portfolio.rank_stocks can consume it directly.
+    Tickers whose last bar is more than max_age_days older than the panel's newest are left out.
+    """
+    indicators = panel_indicators(panel)
+    close = panel.own_bars()[2]
+    X = np.column_stack([indicators[f][-1] for f in FEATURES])
+    ok = ~np.isnan(X).any(axis=1) & ~panel.stale(max_age_days)
+    prob_up = np.full(len(panel.tickers), np.nan)
+    if ok.any():
+        proba = model.predict_proba(X[ok])
+        prob_up[ok] = proba[:, list(model.classes_).index(1)]
+    up, down = expected_moves(close, lookback)
+    results = pd.DataFrame({
+        "Ticker": panel.tickers,
+        "Last_Close": close[-1],
+        "Prob_Up": prob_up,
+        "Predicted_Return %": (prob_up * up + (1 - prob_up) * down) * 100,
+    })
+    return rank_stocks(results[ok].reset_index(drop=True))
+
+def check_parity(df, rtol=1e-9):
+    from feature_engineering import add_technical_indicators
+
+    batch = add_technical_indicators(df.copy())
+    indicators = panel_indicators(Panel.from_frames({"T": df}))
+    rows = df.index.get_indexer(batch.index)
+    streamed = np.column_stack([indicators[f][rows, 0] for f in FEATURES])
+    return np.allclose(streamed, batch[FEATURES].values, rtol=rtol, atol=1e-9)
+
+if __name__ == "__main__":
+    from sklearn.ensemble import RandomForestClassifier
+    from feature_engineering import add_technical_indicators
+
+    rng = np.random.default_rng(0)
+    n_days, n_tickers = 500, 2000
+    dates = pd.bdate_range("2024-01-01", periods=n_days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, (n_days, n_tickers)), axis=0))
+    spread = np.abs(rng.normal(0, 1.0, (n_days, n_tickers)))
+    panel = Panel(dates, [f"SYM{i:04d}" for i in range(n_tickers)], close + spread, close - spread, close)
+
+    sample = pd.DataFrame({"Open": close[:, 0], "High": close[:, 0] + spread[:, 0],
+                           "Low": close[:, 0] - spread[:, 0], "Close": close[:, 0]}, index=dates)
+    print(f"Parity with add_technical_indicators: {check_parity(sample)}")
+
+    model = RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1).fit(
+        rng.normal(size=(2000, len(FEATURES))), rng.integers(0, 2, 2000))
+    start = time.perf_counter()
+    ranked = scan(panel, model)
+    elapsed = time.perf_counter() - start
+    print(f"Scanned {n_tickers} tickers x {n_days} days in {elapsed:.2f}s; top: {ranked['Ticker'].head(5).tolist()}")
+
+    n_loop = 50
+    start = time.perf_counter()
+    for i in range(n_loop):
+        df = pd.DataFrame({"Open": close[:, i], "High": close[:, i] + spread[:, i],
+                           "Low": close[:, i] - spread[:, i], "Close": close[:, i]}, index=dates)
+        feats = add_technical_indicators(df)
+        model.predict(feats[FEATURES].iloc[-1:].values)
+    per_ticker = (time.perf_counter() - start) / n_loop
+    print(f"Per-ticker pandas path: {per_ticker * 1000:.0f} ms/ticker -> ~{per_ticker * n_tickers:.0f}s for {n_tickers}")
@@ -1,13 +1,14 @@
-from textblob import TextBlob
+from sentiment_service import article_text, score_texts, score_articles, decayed_sentiment
 
 def compute_sentiment(news_list):
-    sentiments = []
-    for title, desc in news_list:
-        text = f"{title} {desc if desc else ''}"
-        polarity = TextBlob(text).sentiment.polarity
-        sentiments.append(polarity)
+    sentiments = score_texts([article_text(title, desc) for title, desc in news_list])
     if sentiments:
         avg_sentiment = sum(sentiments) / len(sentiments)
     else:
         avg_sentiment = 0
     return avg_sentiment
+
+def sentiment_feature(ticker, index, max_articles=100):
+    # Time-decayed polarity per date in index, ready to join onto the indicator frame
+    from data_fetcher import get_stock_news_items
+    return decayed_sentiment(score_articles(get_stock_news_items(ticker, max_articles)), index)
@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from config import SENTIMENT_DB, NEWS_CACHE_TTL, SENTIMENT_PARALLEL_MIN, SENTIMENT_HALF_LIFE_DAYS
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def article_text(title, desc):
+    return f"{title} {desc if desc else ''}"
+
+def _polarity(text):
+    from textblob import TextBlob
+    return TextBlob(text).sentiment.polarity
+
+def _polarity_chunk(texts):
+    return [_polarity(t) for t in texts]
+
+
+class SentimentStore:
+    """SQLite-backed polarity cache keyed by content hash, plus a TTL'd per-ticker news cache."""
+
+    def __init__(self, path=SENTIMENT_DB, news_ttl=NEWS_CACHE_TTL):
+        self.path = path
+        self.news_ttl = news_ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS polarity (key TEXT PRIMARY KEY, score REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS news (ticker TEXT PRIMARY KEY, fetched_at REAL, payload TEXT, "
+                          "page_size INTEGER DEFAULT 0)")
+        if "page_size" not in {row[1] for row in self.conn.execute("PRAGMA table_info(news)")}:
+            self.conn.execute("ALTER TABLE news ADD COLUMN page_size INTEGER DEFAULT 0")
+        self.conn.commit()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "news_hits": 0, "news_misses": 0}
+
+    def get_scores(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT key, score FROM polarity WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(rows.fetchall())
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(keys) - len(found)
+        return found
+
+    def put_scores(self, scores):
+        with self._lock:
+            self.conn.executemany("INSERT OR REPLACE INTO polarity VALUES (?, ?)", scores.items())
+            self.conn.commit()
+
+    def get_news(self, ticker, max_articles):
+        # A fetch asked for page_size articles; if it came back short, that was everything available,
+        # so it answers any request up to page_size without refetching.
+        with self._lock:
+            row = self.conn.execute("SELECT fetched_at, payload, page_size FROM news WHERE ticker = ?",
+                                    (ticker,)).fetchone()
+        if row and time.time() - row[0] < self.news_ttl:
+            articles = json.loads(row[1])
+            if (row[2] or 0) >= max_articles or len(articles) >= max_articles:
+                self.stats["news_hits"] += 1
+                return articles[:max_articles]
+        self.stats["news_misses"] += 1
+        return None
+
+    def put_news(self, ticker, articles, page_size):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO news (ticker, fetched_at, payload, page_size) VALUES (?, ?, ?, ?)",
+                              (ticker, time.time(), json.dumps(articles), page_size))
+            self.conn.commit()
+
+
+sentiment_store = None
+
+def get_sentiment_store():
+    global sentiment_store
+    if sentiment_store is None:
+        sentiment_store = SentimentStore()
+    return sentiment_store
+
+def score_texts(texts, store=None, workers=None, min_parallel=SENTIMENT_PARALLEL_MIN):
+    store = store or get_sentiment_store()
+    keys = [text_key(t) for t in texts]
+    unique = dict(zip(keys, texts))
+    scores = store.get_scores(unique)
+    cold = [(k, t) for k, t in unique.items() if k not in scores]
+    if cold:
+        cold_texts = [t for _, t in cold]
+        workers = workers or os.cpu_count() or 1
+        if len(cold) >= min_parallel and workers > 1:
+            # Chunk so each task amortizes the TextBlob import and IPC
+            size = max(1, len(cold_texts) // (workers * 4))
+            chunks = [cold_texts[i:i + size] for i in range(0, len(cold_texts), size)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                polarities = [p for chunk in pool.map(_polarity_chunk, chunks) for p in chunk]
+        else:
+            polarities = _polarity_chunk(cold_texts)
+        fresh = {k: p for (k, _), p in zip(cold, polarities)}
+        store.put_scores(fresh)
+        scores.update(fresh)
+    return [scores[k] for k in keys]
+
+def score_articles(articles, store=None):
+    polarities = score_texts([article_text(a["title"], a.get("description")) for a in articles], store)
+    return [dict(a, polarity=p) for a, p in zip(articles, polarities)]
+
+def decayed_sentiment(scored_articles, index, half_life_days=SENTIMENT_HALF_LIFE_DAYS):
+    # Exponentially weighted mean of article polarity as of each date in index
+    index = pd.DatetimeIndex(index)
+    result = pd.Series(0.0, index=index, name="Sentiment")
+    if not scored_articles or len(index) == 0:
+        return result
+    published = pd.to_datetime([a["published_at"] for a in scored_articles], utc=True).tz_convert(None).normalize()
+    polarity = np.array([a["polarity"] for a in scored_articles], dtype=float)
+    daily = pd.DataFrame({"sum": polarity, "count": 1.0}, index=published).groupby(level=0).sum()
+    days = index.tz_convert(None).normalize() if index.tz is not None else index.normalize()
+    timeline = daily.index.union(days)
+    daily = daily.reindex(timeline, fill_value=0.0)
+
+    decay = np.log(2) / half_life_days
+    gaps = np.diff(timeline.values).astype("timedelta64[D]").astype(float)
+    factors = np.exp(-decay * np.concatenate([[0.0], gaps]))
+    weighted_sum = np.empty(len(timeline))
+    weight = np.empty(len(timeline))
+    s = w = 0.0
+    for i, (f, x, c) in enumerate(zip(factors, daily["sum"].values, daily["count"].values)):
+        s = s * f + x
+        w = w * f + c
+        weighted_sum[i], weight[i] = s, w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = np.where(weight > 1e-9, weighted_sum / weight, 0.0)
+    result[:] = pd.Series(values, index=timeline).reindex(days).values
+    return result
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    words = ["surges", "plunges", "beats", "misses", "strong", "weak", "record", "loss", "profit", "growth",
+             "downgrade", "upgrade", "bullish", "bearish", "stable", "volatile", "earnings", "guidance"]
+    corpus = [f"Company {i} " + " ".join(rng.choice(words, 6)) for i in range(100_000)]
+    store = SentimentStore(os.path.join(tempfile.mkdtemp(), "sentiment.db"))
+    for label in ("cold", "warm"):
+        start = time.perf_counter()
+        score_texts(corpus, store=store)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {len(corpus):,} headlines in {elapsed:.2f}s -> {len(corpus) / elapsed:,.0f}/sec")
+    print(store.stats)
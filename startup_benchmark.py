@@ -0,0 +1,45 @@
+import os
+import ast
+import sys
+import json
+import subprocess
+
+HEAVY = ["tensorflow", "prophet", "cmdstanpy", "xgboost", "sklearn", "yfinance", "kiteconnect", "newsapi", "ta"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def app_modules(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")):
+    # Project modules app.py imports at top level, read from its source so the list cannot drift
+    root = os.path.dirname(path)
+    with open(path, "r") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return [n for n in dict.fromkeys(names) if os.path.exists(os.path.join(root, n.split(".")[0] + ".py"))]
+
+def measure_import(modules, repeats=3):
+    """Cold-import modules in fresh interpreters; returns the best time and which heavy packages got loaded."""
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(modules=modules, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r["seconds"])
+    return best["seconds"], best["loaded"]
+
+if __name__ == "__main__":
+    for label, modules in [("app startup", app_modules()), ("models", ["models"]), ("models_lstm", ["models_lstm"]),
+                           ("models_prophet", ["models_prophet"])]:
+        seconds, loaded = measure_import(modules)
+        print(f"{label:>15}: {seconds:.2f}s, heavy packages loaded: {', '.join(loaded) or 'none'}")
@@ -0,0 +1,187 @@
+import time
+from collections import deque
+
+FEATURES = ["RSI", "MACD", "SMA_50", "SMA_200", "EMA_20", "EMA_50", "ATR"]
+
+RSI_WINDOW = 14
+ATR_WINDOW = 14
+MACD_FAST = 12
+MACD_SLOW = 26
+
+
+class _RollingMean:
+    __slots__ = ("window", "values", "total")
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self.total += x
+        if len(self.values) < self.window:
+            return None
+        return self.total / self.window
+
+
+class _Ema:
+    # Same recurrence as pandas ewm(span=..., adjust=False), seeded with the first value
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span=None, alpha=None):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.value = None
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class IndicatorState:
+    """Per-ticker running state for the indicators in add_technical_indicators."""
+
+    __slots__ = ("count", "prev_close", "rsi_up", "rsi_dn", "ema_fast", "ema_slow",
+                 "ema_20", "ema_50", "sma_50", "sma_200", "atr", "atr_seed")
+
+    def __init__(self):
+        self.count = 0
+        self.prev_close = None
+        self.rsi_up = _Ema(alpha=1.0 / RSI_WINDOW)
+        self.rsi_dn = _Ema(alpha=1.0 / RSI_WINDOW)
+        self.ema_fast = _Ema(span=MACD_FAST)
+        self.ema_slow = _Ema(span=MACD_SLOW)
+        self.ema_20 = _Ema(span=20)
+        self.ema_50 = _Ema(span=50)
+        self.sma_50 = _RollingMean(50)
+        self.sma_200 = _RollingMean(200)
+        self.atr = 0.0
+        self.atr_seed = 0.0
+
+    def update(self, close, high=None, low=None):
+        high = close if high is None else high
+        low = close if low is None else low
+        prev_close = self.prev_close
+        self.count += 1
+        n = self.count
+
+        if prev_close is None:
+            diff = 0.0
+            true_range = high - low
+        else:
+            diff = close - prev_close
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev_close = close
+
+        avg_up = self.rsi_up.update(diff if diff > 0 else 0.0)
+        avg_dn = self.rsi_dn.update(-diff if diff < 0 else 0.0)
+        fast = self.ema_fast.update(close)
+        slow = self.ema_slow.update(close)
+        ema_20 = self.ema_20.update(close)
+        ema_50 = self.ema_50.update(close)
+        sma_50 = self.sma_50.update(close)
+        sma_200 = self.sma_200.update(close)
+
+        # ta seeds ATR with the plain mean of the first window, then applies Wilder smoothing
+        if n < ATR_WINDOW:
+            self.atr_seed += true_range
+        elif n == ATR_WINDOW:
+            self.atr = (self.atr_seed + true_range) / ATR_WINDOW
+        else:
+            self.atr = (self.atr * (ATR_WINDOW - 1) + true_range) / float(ATR_WINDOW)
+
+        if sma_200 is None:
+            return None
+
+        rsi = 100.0 if avg_dn == 0 else 100 - (100 / (1 + avg_up / avg_dn))
+        return {
+            "Close": close,
+            "RSI": rsi,
+            "MACD": fast - slow,
+            "SMA_50": sma_50,
+            "SMA_200": sma_200,
+            "EMA_20": ema_20,
+            "EMA_50": ema_50,
+            "ATR": self.atr,
+        }
+
+
+class StreamingIndicatorEngine:
+    """Constant-time-per-tick counterpart to feature_engineering.add_technical_indicators."""
+
+    def __init__(self):
+        self.states = {}
+        self.latest = {}
+
+    def update(self, ticker, close, high=None, low=None):
+        state = self.states.get(ticker)
+        if state is None:
+            state = self.states[ticker] = IndicatorState()
+        row = state.update(close, high, low)
+        if row is not None:
+            self.latest[ticker] = row
+        return row
+
+    def warm_up(self, ticker, df):
+        row = None
+        for high, low, close in zip(df["High"].values, df["Low"].values, df["Close"].values):
+            row = self.update(ticker, float(close), float(high), float(low))
+        return row
+
+    def reset(self, ticker=None):
+        if ticker is None:
+            self.states.clear()
+            self.latest.clear()
+        else:
+            self.states.pop(ticker, None)
+            self.latest.pop(ticker, None)
+
+
+def check_parity(df, rtol=1e-9):
+    import numpy as np
+    from feature_engineering import add_technical_indicators
+
+    batch = add_technical_indicators(df.copy())
+    engine = StreamingIndicatorEngine()
+    rows = {}
+    for idx, high, low, close in zip(df.index, df["High"].values, df["Low"].values, df["Close"].values):
+        row = engine.update("T", float(close), float(high), float(low))
+        if row is not None:
+            rows[idx] = row
+    streamed = np.array([[rows[idx][f] for f in FEATURES] for idx in batch.index])
+    return np.allclose(streamed, batch[FEATURES].values, rtol=rtol, atol=1e-9)
+
+
+def benchmark(n_symbols=500, ticks_per_symbol=1000, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (ticks_per_symbol, n_symbols)), axis=0))
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    engine = StreamingIndicatorEngine()
+    start = time.perf_counter()
+    for tick in prices.tolist():
+        for symbol, price in zip(symbols, tick):
+            engine.update(symbol, price)
+    elapsed = time.perf_counter() - start
+    total = n_symbols * ticks_per_symbol
+    return {"symbols": n_symbols, "ticks": total, "seconds": elapsed, "ticks_per_sec": total / elapsed}
+
+
+if __name__ == "__main__":
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(1)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 600)))
+    spread = np.abs(rng.normal(0, 0.5, 600))
+    sample = pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close})
+    print(f"Parity with add_technical_indicators: {check_parity(sample)}")
+    stats = benchmark()
+    print(f"{stats['ticks']} ticks over {stats['symbols']} symbols in {stats['seconds']:.2f}s "
+          f"-> {stats['ticks_per_sec']:,.0f} ticks/sec")
@@ -0,0 +1,195 @@
+import json
+import time
+import threading
+from collections import deque
+from metrics import timer
+from config import TICK_BUFFER_SIZE, COALESCE_TICKS
+
+
+class TickIngestor:
+    """Moves tick handling off the KiteTicker thread.
+
+    on_ticks only stamps each tick with "received_at" and appends it to a bounded
+    per-instrument ring buffer; a worker thread drains the buffers and calls
+    handler(ticks). With coalesce=True only the newest tick per instrument is
+    handed over and the stale ones are counted as coalesced.
+    """
+
+    def __init__(self, handler, capacity=TICK_BUFFER_SIZE, coalesce=COALESCE_TICKS):
+        self.handler = handler
+        self.capacity = capacity
+        self.coalesce = coalesce
+        self._buffers = {}
+        self._dirty = {}
+        self._cond = threading.Condition()
+        self._busy = False
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {"received": 0, "processed": 0, "coalesced": 0, "dropped": 0,
+                      "batches": 0, "errors": 0, "max_depth": 0}
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def on_ticks(self, ws, ticks):
+        now = time.perf_counter()
+        with self._cond:
+            for tick in ticks:
+                token = tick["instrument_token"]
+                tick["received_at"] = now
+                buf = self._buffers.get(token)
+                if buf is None:
+                    buf = self._buffers[token] = deque(maxlen=self.capacity)
+                if len(buf) == self.capacity:
+                    self.stats["dropped"] += 1
+                buf.append(tick)
+                self.stats["max_depth"] = max(self.stats["max_depth"], len(buf))
+                self._dirty[token] = None
+            self.stats["received"] += len(ticks)
+            self._cond.notify()
+
+    def _take_batch(self):
+        batch = []
+        for token in self._dirty:
+            buf = self._buffers[token]
+            if self.coalesce:
+                self.stats["coalesced"] += len(buf) - 1
+                batch.append(buf[-1])
+            else:
+                batch.extend(buf)
+            buf.clear()
+        self._dirty = {}
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._dirty and not self._stop.is_set():
+                    self._cond.wait(0.5)
+                batch = self._take_batch()
+                self._busy = bool(batch)
+            if not batch:
+                continue
+            try:
+                # Times the handler's work per batch, not the websocket callback that only enqueues
+                with timer("tick_callback"):
+                    self.handler(batch)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"[ERROR] Tick handler failed: {e}")
+            finally:
+                with self._cond:
+                    self.stats["processed"] += len(batch)
+                    self.stats["batches"] += 1
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def wait_idle(self, timeout=10):
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._dirty or self._busy:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+
+class TickRecorder:
+    """on_ticks-compatible callback that appends each tick batch to a JSON-lines file."""
+
+    def __init__(self, path, forward=None):
+        self.path = path
+        self.forward = forward
+        self._lock = threading.Lock()
+
+    def on_ticks(self, ws, ticks):
+        line = json.dumps([{"instrument_token": t["instrument_token"], "last_price": t["last_price"]}
+                           for t in ticks])
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+        if self.forward:
+            self.forward(ws, ticks)
+
+
+def load_recorded_ticks(path):
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_tick_batches(tokens, n_batches, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, (n_batches, len(tokens))), axis=0))
+    return [[{"instrument_token": tok, "last_price": float(p)} for tok, p in zip(tokens, row)]
+            for row in prices]
+
+def replay(batches, on_ticks, rate=None):
+    # rate is ticks/sec across all instruments; None replays as fast as possible
+    start = time.perf_counter()
+    sent = 0
+    for batch in batches:
+        if rate:
+            delay = start + sent / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        # Fresh dicts, as KiteTicker would deliver
+        on_ticks(None, [dict(t) for t in batch])
+        sent += len(batch)
+    return sent, time.perf_counter() - start
+
+def run_replay(batches, model, rate=None, coalesce=True, capacity=TICK_BUFFER_SIZE, warmup_batches=0):
+    from streaming_indicators import StreamingIndicatorEngine
+    from inference_scheduler import InferenceScheduler
+
+    # Warm-up batches go straight into the indicator engine so the timed replay produces signals
+    engine = StreamingIndicatorEngine()
+    for batch in batches[:warmup_batches]:
+        for tick in batch:
+            engine.update(tick["instrument_token"], tick["last_price"])
+    batches = batches[warmup_batches:]
+    scheduler = InferenceScheduler(model, lambda *args: None)
+
+    def handler(ticks):
+        for tick in ticks:
+            row = engine.update(tick["instrument_token"], tick["last_price"])
+            if row is not None:
+                scheduler.submit(tick["instrument_token"], row, received_at=tick["received_at"])
+        scheduler.flush()
+
+    ingestor = TickIngestor(handler, capacity=capacity, coalesce=coalesce).start()
+    sent, feed_seconds = replay(batches, ingestor.on_ticks, rate)
+    ingestor.wait_idle()
+    ingestor.stop()
+    return {"sent": sent, "feed_seconds": feed_seconds, "ingest": dict(ingestor.stats),
+            "tick_to_signal_ms": scheduler.latency_percentiles()}
+
+
+if __name__ == "__main__":
+    import numpy as np
+    from sklearn.ensemble import RandomForestClassifier
+    from inference_scheduler import FEATURES
+
+    rng = np.random.default_rng(0)
+    model = RandomForestClassifier(n_estimators=200, random_state=42).fit(
+        rng.normal(size=(1000, len(FEATURES))), rng.integers(0, 2, 1000))
+    batches = synthetic_tick_batches(list(range(100)), 600)
+    for rate in (2000, 10000, None):
+        result = run_replay(batches, model, rate=rate, warmup_batches=200)
+        ingest = result["ingest"]
+        latency = ", ".join(f"{k} {v:.1f} ms" for k, v in result["tick_to_signal_ms"].items())
+        print(f"rate={rate or 'max'}: {result['sent']} ticks in {result['feed_seconds']:.2f}s, "
+              f"processed {ingest['processed']}, coalesced {ingest['coalesced']}, dropped {ingest['dropped']}, "
+              f"batches {ingest['batches']}; tick-to-signal {latency}")
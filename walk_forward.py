@@ -0,0 +1,89 @@
+import os
+import time
+import resource
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.metrics import accuracy_score
+from models import FEATURES, MODEL_FACTORIES
+
+def feature_matrix(df):
+    X = np.ascontiguousarray(df[FEATURES].to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(df["Target"].to_numpy(dtype=np.int8))
+    return X, y
+
+def walk_forward_folds(n_rows, n_folds=5, test_size=None, mode="expanding", train_size=None):
+    # Slices, so X[train] / X[test] are views into the shared matrix
+    test_size = test_size or n_rows // (n_folds + 1)
+    first_test = n_rows - n_folds * test_size
+    if first_test <= 0:
+        raise ValueError("Not enough rows for the requested folds")
+    train_size = train_size or first_test
+    folds = []
+    for k in range(n_folds):
+        test_start = first_test + k * test_size
+        train_start = 0 if mode == "expanding" else max(0, test_start - train_size)
+        folds.append((slice(train_start, test_start), slice(test_start, test_start + test_size)))
+    return folds
+
+def _fit_fold(model_type, X, y, train, test, init_model=None, warm_rounds=None):
+    model = MODEL_FACTORIES[model_type]()
+    start = time.perf_counter()
+    if init_model is not None:
+        # Continue boosting from the previous fold's trees instead of starting over
+        model.set_params(n_estimators=warm_rounds)
+        model.fit(X[train], y[train], xgb_model=init_model.get_booster())
+    else:
+        model.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    acc = accuracy_score(y[test], model.predict(X[test]))
+    return model, {"train": (train.start, train.stop), "test": (test.start, test.stop),
+                   "accuracy": acc, "fit_seconds": fit_seconds}
+
+def walk_forward(df, model_type="RandomForest", n_folds=5, test_size=None, mode="expanding",
+                 train_size=None, workers=None, warm_start=True, warm_rounds=25):
+    """Train and score model_type on successive walk-forward folds of df.
+
+    The feature matrix is built once; folds are fitted on threads (sklearn and
+    XGBoost release the GIL while fitting) so they share it without copies.
+    XGBoost folds run in order and warm-start from the previous fold's booster
+    when warm_start is set.
+    """
+    wall_start = time.perf_counter()
+    X, y = feature_matrix(df)
+    folds = walk_forward_folds(len(X), n_folds, test_size, mode, train_size)
+    results = []
+    if model_type == "XGBoost" and warm_start:
+        model = None
+        for train, test in folds:
+            model, info = _fit_fold(model_type, X, y, train, test, init_model=model, warm_rounds=warm_rounds)
+            results.append(info)
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_fit_fold, model_type, X, y, train, test) for train, test in folds]
+            results = [f.result()[1] for f in futures]
+    for i, info in enumerate(results):
+        info["fold"] = i
+    return {
+        "model_type": model_type,
+        "folds": results,
+        "mean_accuracy": float(np.mean([r["accuracy"] for r in results])),
+        "wall_seconds": time.perf_counter() - wall_start,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+if __name__ == "__main__":
+    import pandas as pd
+    from feature_engineering import add_technical_indicators, create_labels
+
+    rng = np.random.default_rng(0)
+    n = 3000
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, n)))
+    spread = np.abs(rng.normal(0, 1.0, n))
+    df = pd.DataFrame({"Open": close, "High": close + spread, "Low": close - spread, "Close": close})
+    df = create_labels(add_technical_indicators(df))
+    for model_type, warm in [("RandomForest", False), ("XGBoost", False), ("XGBoost", True)]:
+        report = walk_forward(df, model_type, n_folds=5, warm_start=warm)
+        accs = ", ".join(f"{r['accuracy']:.3f}" for r in report["folds"])
+        print(f"{model_type}{' (warm)' if warm else ''}: folds [{accs}] mean {report['mean_accuracy']:.3f}, "
+              f"wall {report['wall_seconds']:.2f}s, peak RSS {report['peak_rss_mb']:.0f} MiB")